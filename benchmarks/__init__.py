@@ -0,0 +1,3 @@
+"""
+Scripts de benchmark e comparação de desempenho do sistema.
+"""
@@ -0,0 +1,78 @@
+"""
+Comparação de precisão e desempenho dos integradores do PendulumSimulation.
+
+Para cada período de controle, a malha fechada (com uma lei de controle linear
+barata, para que o custo medido seja o da física) é simulada com cada
+integrador e comparada com uma solução de referência independente dos
+integradores comparados: RK4 com passo muito menor (REFERENCE_STEP) e o
+mesmo período de controle.
+
+Uso:
+    python -m benchmarks.compare_integrators --horizon 5
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.simulation.pendulum_sim import PendulumSimulation
+
+# Passo do RK4 da solução de referência (s)
+REFERENCE_STEP = 1e-4
+
+# (integrador, subpassos) comparados em cada período de controle
+CONFIGURATIONS = [
+    ('euler', 1),
+    ('euler', 10),
+    ('rk4', 1),
+    ('rk4', 2),
+    ('rk45', 1),
+]
+
+
+def state_feedback(angle, angular_velocity):
+    """Lei de controle PD usada na comparação"""
+    return -(40.0 * angle + 8.0 * angular_velocity)
+
+
+def run(integrator, substeps, control_period, horizon, rtol=1e-6, atol=1e-8):
+    """
+    Simula a malha fechada e retorna (trajetória (passos, 4), tempo em segundos)
+    """
+    sim = PendulumSimulation(dt=control_period, integrator=integrator, substeps=substeps,
+                             rtol=rtol, atol=atol)
+    steps = int(round(horizon / control_period))
+    trajectory = np.empty((steps, 4))
+
+    start = time.perf_counter()
+    for k in range(steps):
+        sim.update(state_feedback(sim.angle, sim.angular_velocity))
+        trajectory[k] = (sim.cart_position, sim.cart_velocity, sim.angle, sim.angular_velocity)
+    elapsed = time.perf_counter() - start
+
+    return trajectory, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os integradores do simulador do pêndulo")
+    parser.add_argument('--horizon', type=float, default=5.0, help="Duração simulada em segundos")
+    parser.add_argument('--periods', type=float, nargs='+', default=[0.01, 0.02, 0.05],
+                        help="Períodos de controle a comparar")
+    args = parser.parse_args()
+
+    print(f"{'período':>8} {'integrador':>10} {'subpassos':>9} {'controle':>9} "
+          f"{'erro ângulo':>12} {'erro posição':>13} {'tempo (ms)':>11} {'passos/s':>10}")
+    for control_period in args.periods:
+        reference_substeps = int(np.ceil(control_period / REFERENCE_STEP))
+        reference, _ = run('rk4', reference_substeps, control_period, args.horizon)
+        for integrator, substeps in CONFIGURATIONS:
+            trajectory, elapsed = run(integrator, substeps, control_period, args.horizon)
+            angle_error = np.max(np.abs(trajectory[:, 2] - reference[:, 2]))
+            position_error = np.max(np.abs(trajectory[:, 0] - reference[:, 0]))
+            print(f"{control_period:>8.3f} {integrator:>10} {substeps:>9d} {len(trajectory):>9d} "
+                  f"{angle_error:>12.2e} {position_error:>13.2e} {elapsed * 1e3:>11.1f} "
+                  f"{len(trajectory) / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Benchmarks de latência e vazão dos controladores e dos simuladores.
+
+Cada benchmark chama repetidamente uma operação (compute_control escalar e em
+lote, construção do sistema fuzzy, uma geração do genético, passos dos
+simuladores), mede cada chamada e reporta p50/p95/p99 e a vazão em itens por
+segundo. Os resultados podem ser gravados em JSON e comparados com uma
+execução anterior: um benchmark cuja mediana piorou mais que o limite é uma
+regressão e o comando termina com código 1.
+
+Uso:
+    python -m benchmarks.suite --output atual.json
+    python -m benchmarks.suite --compare base.json --threshold 0.2
+    python -m benchmarks.suite --filter fis --quick
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from src.simulation.batch_pendulum_sim import BatchPendulumSimulation
+from src.simulation.pendulum_sim import PendulumSimulation
+
+# Tamanho dos lotes nos benchmarks em lote
+BATCH_SIZE = 1000
+
+
+def _states(count, seed=0):
+    """Estados (ângulos, velocidades angulares) reprodutíveis perto do equilíbrio"""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-0.5, 0.5, count), rng.uniform(-2, 2, count)
+
+
+def _scalar_calls(controller):
+    """Chamadas de compute_control em estados que variam a cada chamada"""
+    angles, velocities = _states(4096)
+    index = [0]
+
+    def call():
+        i = index[0] = (index[0] + 1) % len(angles)
+        controller.compute_control(angles[i], velocities[i])
+    return call
+
+
+def _batch_calls(controller):
+    angles, velocities = _states(BATCH_SIZE)
+    return lambda: controller.compute_control_batch(angles, velocities)
+
+
+def _fis(**kwargs):
+    from src.controllers.fis_controller import FISController
+    return FISController(**kwargs)
+
+
+def _initialize_fis(cached):
+    """Reconstrução do sistema do FIS com o cache de sistemas vazio (construção completa) ou já preenchido"""
+    from src.controllers.fuzzy_cache import SYSTEM_CACHE
+    controller = _fis()
+    if cached:
+        return controller._initialize_fuzzy_system
+
+    def call():
+        SYSTEM_CACHE.clear()
+        controller._initialize_fuzzy_system()
+    return call
+
+
+def _neuro_fuzzy():
+    from src.controllers.neuro_fuzzy import NeuroFuzzyController
+    return NeuroFuzzyController()
+
+
+def _neuro_fuzzy_numpy():
+    """Inferência em NumPy com os parâmetros de um NeuroFuzzyController novo"""
+    from src.controllers.neuro_fuzzy_numpy import NeuroFuzzyInference, PARAMETER_NAMES
+    model = _neuro_fuzzy().model
+    return NeuroFuzzyInference(*(getattr(model, name).detach().numpy() for name in PARAMETER_NAMES))
+
+
+def _genetic(**kwargs):
+    from src.controllers.genetic_fuzzy import GeneticFuzzyController
+    return GeneticFuzzyController(seed=0, **kwargs)
+
+
+def _evolve(**kwargs):
+    controller = _genetic(**kwargs)
+    if controller.fitness_mode == 'rollout':
+        rng = np.random.default_rng(0)
+        cases = np.column_stack([rng.uniform(-0.3, 0.3, 10), rng.uniform(-1, 1, 10)])
+    else:
+        angles, velocities = _states(100)
+        cases = np.column_stack([angles, velocities, -2 * angles - velocities])
+    return lambda: controller.evolve(cases)
+
+
+def _simulation_step(**kwargs):
+    simulation = PendulumSimulation(**kwargs)
+
+    def call():
+        simulation.update(-(40.0 * simulation.angle + 8.0 * simulation.angular_velocity))
+    return call
+
+
+def _batch_simulation_step(**kwargs):
+    simulation = BatchPendulumSimulation(BATCH_SIZE, **kwargs)
+    simulation.reset(angle=_states(BATCH_SIZE)[0])
+
+    def call():
+        simulation.update(-(40.0 * simulation.angle + 8.0 * simulation.angular_velocity))
+    return call
+
+
+# (nome, função que monta a chamada medida, itens por chamada, repetições)
+BENCHMARKS = [
+    ('fis.compute_control', lambda: _scalar_calls(_fis()), 1, 2000),
+    ('fis.compute_control[compiled]', lambda: _scalar_calls(_fis(compiled=True)), 1, 20000),
+    ('fis.compute_control_batch', lambda: _batch_calls(_fis()), BATCH_SIZE, 200),
+    ('fis.compute_control_batch[compiled]', lambda: _batch_calls(_fis(compiled=True)), BATCH_SIZE, 2000),
+    ('fis._initialize_fuzzy_system', lambda: _initialize_fis(cached=False), 1, 200),
+    ('fis._initialize_fuzzy_system[cached]', lambda: _initialize_fis(cached=True), 1, 20000),
+    ('neuro_fuzzy.compute_control', lambda: _scalar_calls(_neuro_fuzzy()), 1, 5000),
+    ('neuro_fuzzy.compute_control_batch', lambda: _batch_calls(_neuro_fuzzy()), BATCH_SIZE, 2000),
+    ('neuro_fuzzy_numpy.compute_control', lambda: _scalar_calls(_neuro_fuzzy_numpy()), 1, 20000),
+    ('neuro_fuzzy_numpy.compute_control_batch', lambda: _batch_calls(_neuro_fuzzy_numpy()), BATCH_SIZE, 2000),
+    ('genetic.compute_control', lambda: _scalar_calls(_genetic()), 1, 2000),
+    ('genetic.compute_control_batch', lambda: _batch_calls(_genetic()), BATCH_SIZE, 200),
+    ('genetic.evolve', lambda: _evolve(), 1, 20),
+    ('genetic.evolve[rollout]', lambda: _evolve(fitness_mode='rollout'), 1, 5),
+    ('pendulum_sim.update[euler]', lambda: _simulation_step(), 1, 20000),
+    ('pendulum_sim.update[rk4]', lambda: _simulation_step(integrator='rk4'), 1, 20000),
+    ('pendulum_sim.update[rk45]', lambda: _simulation_step(integrator='rk45'), 1, 5000),
+    ('batch_pendulum_sim.update[euler]', lambda: _batch_simulation_step(), BATCH_SIZE, 5000),
+    ('batch_pendulum_sim.update[rk4]', lambda: _batch_simulation_step(integrator='rk4'), BATCH_SIZE, 2000),
+]
+
+
+def measure(call, repeats, items_per_call=1, warmup=None):
+    """
+    Mede `repeats` chamadas (depois de algumas chamadas de aquecimento).
+
+    Returns:
+        dict: Latências em microssegundos (p50, p95, p99, média, mínimo),
+            vazão em itens por segundo e número de chamadas
+    """
+    for _ in range(warmup if warmup is not None else max(1, repeats // 20)):
+        call()
+
+    durations = np.empty(repeats)
+    clock = time.perf_counter
+    for i in range(repeats):
+        start = clock()
+        call()
+        durations[i] = clock() - start
+
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99]) * 1e6
+    return {
+        'p50_us': float(p50),
+        'p95_us': float(p95),
+        'p99_us': float(p99),
+        'mean_us': float(durations.mean() * 1e6),
+        'min_us': float(durations.min() * 1e6),
+        'throughput_per_s': float(items_per_call * repeats / durations.sum()),
+        'calls': repeats,
+    }
+
+
+def metadata():
+    """Versão do código e do ambiente da execução"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+    }
+
+
+def run(name_filter=None, scale=1.0):
+    """
+    Executa os benchmarks cujo nome contém `name_filter`. Benchmarks que não
+    podem ser montados (por exemplo, sem PyTorch) são pulados com um aviso.
+
+    Returns:
+        dict: Resultado de measure por nome
+    """
+    results = {}
+    for name, setup, items_per_call, repeats in BENCHMARKS:
+        if name_filter and name_filter not in name:
+            continue
+        try:
+            call = setup()
+        except ImportError as e:
+            print(f"{name:<42} pulado ({e})")
+            continue
+        results[name] = measure(call, max(1, int(repeats * scale)), items_per_call)
+        r = results[name]
+        print(f"{name:<42} {r['p50_us']:>11.1f} {r['p95_us']:>11.1f} {r['p99_us']:>11.1f} "
+              f"{r['throughput_per_s']:>14.0f}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compara as medianas com as de uma execução anterior.
+
+    Returns:
+        list: Nomes dos benchmarks com p50 mais de `threshold` (fração) acima da base
+    """
+    regressions = []
+    print(f"\n{'benchmark':<42} {'base p50':>11} {'atual p50':>11} {'variação':>9}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        change = result['p50_us'] / baseline[name]['p50_us'] - 1.0
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<42} {baseline[name]['p50_us']:>11.1f} {result['p50_us']:>11.1f} "
+              f"{change:>+9.1%}{'  REGRESSÃO' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de latência e vazão dos controladores e simuladores")
+    parser.add_argument('--output', help="Grava os resultados em JSON")
+    parser.add_argument('--compare', help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Piora relativa do p50 considerada regressão (padrão: 0.2 = 20%%)")
+    parser.add_argument('--filter', help="Executa apenas os benchmarks cujo nome contém este texto")
+    parser.add_argument('--quick', action='store_true', help="Usa 10%% das repetições")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<42} {'p50 (µs)':>11} {'p95 (µs)':>11} {'p99 (µs)':>11} {'itens/s':>14}")
+    results = run(args.filter, 0.1 if args.quick else 1.0)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'metadata': metadata(), 'results': results}, f, indent=2)
+        print(f"\nResultados gravados em {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressão(ões) acima de {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
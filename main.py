@@ -1,12 +1,27 @@
 import sys
-from PyQt5.QtWidgets import QApplication
-from src.gui.main_window import MainWindow
+from src.gui.startup import STARTUP_TIMER
 
 def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    # --startup-report: imprime o tempo de cada importação e etapa da inicialização
+    report = '--startup-report' in sys.argv
+    STARTUP_TIMER.verbose = report
+    
+    # Importações medidas uma a uma (as dependências já carregadas não contam de novo)
+    QtWidgets = STARTUP_TIMER.import_module('PyQt5.QtWidgets')
+    STARTUP_TIMER.import_module('numpy')
+    STARTUP_TIMER.import_module('matplotlib.backends.backend_qt5agg')
+    main_window = STARTUP_TIMER.import_module('src.gui.main_window')
+    
+    app = QtWidgets.QApplication(sys.argv)
+    STARTUP_TIMER.mark("QApplication")
+    window = main_window.MainWindow()
+    STARTUP_TIMER.mark("MainWindow")
     window.show()
+    STARTUP_TIMER.mark("window.show()")
+    
+    if report:
+        print(STARTUP_TIMER.report())
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,178 @@
+"""
+Destilação de um controlador "professor" (por exemplo, o FISController) em um
+NeuroFuzzyController.
+
+Os estados são amostrados em uma grade (ângulo x velocidade angular) e/ou em
+trajetórias de malha fechada simuladas em lote, rotulados de uma só vez com
+compute_control_batch do professor e usados para ajustar o NeuroFuzzySystem
+em mini-lotes, com o erro em um conjunto de validação separado reportado a
+cada época.
+
+Uso:
+    python -m src.controllers.distillation --epochs 50 --output neuro_fuzzy.pt
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from src.controllers.neuro_fuzzy import NeuroFuzzyController, ReplayBuffer
+from src.simulation.batch_pendulum_sim import BatchPendulumSimulation
+
+
+def state_grid(angle_limit=np.pi/2, velocity_limit=5.0, resolution=101):
+    """Estados de uma grade regular em ±angle_limit x ±velocity_limit: (ângulos, velocidades)"""
+    angles, velocities = np.meshgrid(np.linspace(-angle_limit, angle_limit, resolution),
+                                     np.linspace(-velocity_limit, velocity_limit, resolution),
+                                     indexing='ij')
+    return angles.ravel(), velocities.ravel()
+
+
+def trajectory_states(controller, num_envs=256, steps=300, initial_angle=0.5, initial_velocity=1.0,
+                      rng=None, **plant):
+    """
+    Estados visitados por `controller` em malha fechada, simulando num_envs
+    pêndulos em lote a partir de condições iniciais aleatórias.
+
+    Returns:
+        tuple: (ângulos, velocidades) com steps * num_envs estados
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    simulation = BatchPendulumSimulation(num_envs, **plant)
+    simulation.reset(angle=rng.uniform(-initial_angle, initial_angle, num_envs),
+                     angular_velocity=rng.uniform(-initial_velocity, initial_velocity, num_envs))
+    angles = np.empty((steps, num_envs))
+    velocities = np.empty((steps, num_envs))
+    for step in range(steps):
+        angles[step] = simulation.angle
+        velocities[step] = simulation.angular_velocity
+        simulation.update(controller.compute_control_batch(simulation.angle, simulation.angular_velocity))
+    return angles.ravel(), velocities.ravel()
+
+
+def build_dataset(teacher, grid_resolution=101, angle_limit=np.pi/2, velocity_limit=5.0,
+                  trajectory_envs=256, trajectory_steps=300, rng=None, **plant):
+    """
+    Estados da grade e das trajetórias do professor, rotulados em lote.
+
+    Returns:
+        tuple: (estados (N, 2), forças do professor (N,))
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    angles, velocities = [], []
+    if grid_resolution:
+        grid = state_grid(angle_limit, velocity_limit, grid_resolution)
+        angles.append(grid[0])
+        velocities.append(grid[1])
+    if trajectory_envs and trajectory_steps:
+        trajectories = trajectory_states(teacher, trajectory_envs, trajectory_steps, rng=rng, **plant)
+        angles.append(trajectories[0])
+        velocities.append(trajectories[1])
+
+    states = np.column_stack([np.concatenate(angles), np.concatenate(velocities)])
+    return states, teacher.compute_control_batch(states[:, 0], states[:, 1])
+
+
+def validation_error(student, states, targets):
+    """Erros da saída do aluno em relação aos alvos: {'rmse', 'mae', 'max'}"""
+    error = student.compute_control_batch(states[:, 0], states[:, 1]) - targets
+    return {'rmse': float(np.sqrt(np.mean(error ** 2))),
+            'mae': float(np.mean(np.abs(error))),
+            'max': float(np.max(np.abs(error)))}
+
+
+def distill(teacher, student=None, epochs=50, batch_size=256, validation_fraction=0.1, seed=None,
+            verbose=True, **dataset_params):
+    """
+    Ajusta o aluno às saídas do professor.
+
+    Args:
+        teacher: Controlador com compute_control_batch (por exemplo, FISController)
+        student (NeuroFuzzyController): Aluno (padrão: um novo NeuroFuzzyController)
+        epochs (int): Épocas sobre o conjunto de treino
+        batch_size (int): Tamanho dos mini-lotes
+        validation_fraction (float): Fração dos estados separada para validação
+        seed (int): Semente da amostragem, da separação e dos mini-lotes
+        **dataset_params: Parâmetros de build_dataset (grade, trajetórias, planta)
+
+    Returns:
+        tuple: (aluno treinado, histórico {'train_loss', 'validation'} por época)
+    """
+    rng = np.random.default_rng(seed)
+    if seed is not None:
+        torch.manual_seed(seed)
+    if student is None:
+        student = NeuroFuzzyController(seed=seed)
+
+    states, targets = build_dataset(teacher, rng=rng, **dataset_params)
+    order = rng.permutation(len(targets))
+    num_validation = int(len(targets) * validation_fraction)
+    validation, train = order[:num_validation], order[num_validation:]
+
+    # O conjunto de treino inteiro vai para o buffer do aluno
+    student.replay_buffer = ReplayBuffer(max(len(train), 1))
+    student.add_experience(states[train, 0], states[train, 1], targets[train])
+
+    history = {'train_loss': [], 'validation': []}
+    for epoch in range(epochs):
+        history['train_loss'].extend(student.train(epochs=1, batch_size=batch_size))
+        if num_validation:
+            history['validation'].append(validation_error(student, states[validation], targets[validation]))
+        if verbose:
+            message = f"Época {epoch + 1}/{epochs}: perda de treino {history['train_loss'][-1]:.4f}"
+            if num_validation:
+                message += (f", validação RMSE {history['validation'][-1]['rmse']:.4f}"
+                            f" (máx. {history['validation'][-1]['max']:.4f})")
+            print(message)
+
+    return student, history
+
+
+def inference_time(controller, calls=2000):
+    """Tempo médio por chamada de compute_control em segundos"""
+    angles = np.linspace(-0.5, 0.5, calls)
+    start = time.perf_counter()
+    for angle in angles:
+        controller.compute_control(angle, -angle)
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    from src.controllers.fis_controller import FISController
+
+    parser = argparse.ArgumentParser(description="Destila o FISController em um NeuroFuzzyController")
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--learning-rate', type=float, default=0.01)
+    parser.add_argument('--num-rules', type=int, default=9)
+    parser.add_argument('--grid-resolution', type=int, default=101, help="Pontos por eixo da grade (0 desliga)")
+    parser.add_argument('--trajectory-envs', type=int, default=256, help="Pêndulos simulados (0 desliga)")
+    parser.add_argument('--trajectory-steps', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Arquivo para salvar o state_dict do modelo (torch.save)")
+    parser.add_argument('--export', help="Arquivo .npz com os parâmetros para inferência sem PyTorch")
+    args = parser.parse_args()
+
+    teacher = FISController()
+    # A inicialização do modelo usa o gerador do PyTorch: semeado antes de criar o aluno
+    torch.manual_seed(args.seed)
+    student = NeuroFuzzyController(learning_rate=args.learning_rate, num_rules=args.num_rules, seed=args.seed)
+    student, history = distill(teacher, student, epochs=args.epochs, batch_size=args.batch_size,
+                               seed=args.seed, grid_resolution=args.grid_resolution,
+                               trajectory_envs=args.trajectory_envs, trajectory_steps=args.trajectory_steps)
+
+    teacher_time = inference_time(teacher)
+    student_time = inference_time(student)
+    print(f"Inferência: professor {teacher_time * 1e6:.1f} µs/chamada, aluno {student_time * 1e6:.1f} µs/chamada")
+
+    if args.output:
+        torch.save(student.model.state_dict(), args.output)
+        print(f"Modelo salvo em {args.output}")
+    if args.export:
+        student.export_parameters(args.export)
+        print(f"Parâmetros exportados para {args.export}")
+
+
+if __name__ == "__main__":
+    main()
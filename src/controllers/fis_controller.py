@@ -1,12 +1,41 @@
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
+
+from src.controllers.fuzzy_cache import SYSTEM_CACHE, parameter_key
+from src.controllers.fuzzy_engine import MamdaniEngine, trimf
+
+# Atributos da tabela compilada guardados no cache de sistemas
+_TABLE_ATTRIBUTES = ('table_angles', 'table_velocities', 'lookup_table', '_table_rows', '_table_bounds',
+                     '_table_origin', '_table_scale', '_table_live', 'compiled_max_error')
+
+# Pontos por célula e por eixo na medida do erro da tabela compilada, com um
+# limite de pontos por eixo (o sistema exato é caro de avaliar)
+ERROR_OVERSAMPLE = 4
+ERROR_MAX_POINTS = 300
+
+
+def _check_resolution(table_resolution):
+    """A interpolação bilinear precisa de ao menos uma célula (2 pontos por eixo)"""
+    if table_resolution < 2:
+        raise ValueError(f"table_resolution deve ser pelo menos 2 (recebido {table_resolution})")
 
 class FISController:
-    def __init__(self):
+    def __init__(self, compiled=False, table_resolution=51, backend='numpy'):
         # Fator de ganho para ajuste fino do controle
         self.gain = 0.5
         
+        # Motor de inferência: 'numpy' (nativo, vetorizado) ou 'skfuzzy' (referência)
+        self.backend = backend
+        
+        # Modo compilado: a base de regras é amostrada em uma tabela 2-D
+        # (ângulo x velocidade angular) e consultada por interpolação bilinear
+        _check_resolution(table_resolution)
+        self.compiled = compiled
+        self.table_resolution = table_resolution
+        self.lookup_table = None
+        # Maior erro da tabela medido na amostra densa de _build_lookup_table
+        # (picos mais estreitos que o espaçamento da amostra podem escapar)
+        self.compiled_max_error = None
+        
         # Universo de discurso mais preciso próximo do zero
         self.angle_range = np.arange(-np.pi/2, np.pi/2, 0.01)  # Reduzido para melhor precisão
         self.angular_velocity_range = np.arange(-5, 5, 0.1)    # Reduzido para melhor controle
@@ -15,96 +44,293 @@ class FISController:
         self._initialize_fuzzy_system()
     
     def _initialize_fuzzy_system(self):
-        """Inicializa ou reinicializa o sistema fuzzy com os parâmetros atuais"""
+        """
+        Inicializa ou reinicializa o sistema fuzzy com os parâmetros atuais.
+        Um sistema já construído com os mesmos universos (e backend) é
+        reaproveitado do cache de sistemas.
+        """
+        self._system_key = parameter_key('fis', self.backend, self.angle_range,
+                                         self.angular_velocity_range, self.force_range)
+        system = SYSTEM_CACHE.get_or_build(self._system_key, self._build_fuzzy_system)
+        for name, value in system.items():
+            setattr(self, name, value)
+        
+        if self.backend == 'skfuzzy':
+            # A simulação guarda entradas e saídas: uma por controlador
+            from skfuzzy import control as ctrl
+            self.simulation = ctrl.ControlSystemSimulation(self.control_system)
+        
+        # Recompila a tabela sempre que o sistema fuzzy é reconstruído
+        if self.compiled:
+            self._compile_lookup_table()
+    
+    def _build_fuzzy_system(self):
+        """
+        Constrói o sistema fuzzy dos universos atuais.
+        
+        Returns:
+            dict: Atributos do sistema ('engine' e, no backend skfuzzy, as
+                variáveis e o ControlSystem)
+        """
         # Conjuntos fuzzy para ângulo - mais precisos próximos do zero
-        self.angle = ctrl.Antecedent(self.angle_range, 'angle')
-        self.angle['negative_large'] = fuzz.trimf(self.angle_range, [-np.pi/2, -np.pi/4, -np.pi/8])
-        self.angle['negative_small'] = fuzz.trimf(self.angle_range, [-np.pi/4, -np.pi/8, 0])
-        self.angle['zero'] = fuzz.trimf(self.angle_range, [-np.pi/8, 0, np.pi/8])
-        self.angle['positive_small'] = fuzz.trimf(self.angle_range, [0, np.pi/8, np.pi/4])
-        self.angle['positive_large'] = fuzz.trimf(self.angle_range, [np.pi/8, np.pi/4, np.pi/2])
+        angle_sets = [
+            ('negative_large', [-np.pi/2, -np.pi/4, -np.pi/8]),
+            ('negative_small', [-np.pi/4, -np.pi/8, 0]),
+            ('zero', [-np.pi/8, 0, np.pi/8]),
+            ('positive_small', [0, np.pi/8, np.pi/4]),
+            ('positive_large', [np.pi/8, np.pi/4, np.pi/2]),
+        ]
         
         # Conjuntos fuzzy para velocidade angular - mais precisos próximos do zero
-        self.angular_velocity = ctrl.Antecedent(self.angular_velocity_range, 'angular_velocity')
-        self.angular_velocity['negative_large'] = fuzz.trimf(self.angular_velocity_range, [-5, -2.5, -1])
-        self.angular_velocity['negative_small'] = fuzz.trimf(self.angular_velocity_range, [-2.5, -1, 0])
-        self.angular_velocity['zero'] = fuzz.trimf(self.angular_velocity_range, [-1, 0, 1])
-        self.angular_velocity['positive_small'] = fuzz.trimf(self.angular_velocity_range, [0, 1, 2.5])
-        self.angular_velocity['positive_large'] = fuzz.trimf(self.angular_velocity_range, [1, 2.5, 5])
+        velocity_sets = [
+            ('negative_large', [-5, -2.5, -1]),
+            ('negative_small', [-2.5, -1, 0]),
+            ('zero', [-1, 0, 1]),
+            ('positive_small', [0, 1, 2.5]),
+            ('positive_large', [1, 2.5, 5]),
+        ]
         
         # Conjuntos fuzzy para força - mais suaves
-        self.force = ctrl.Consequent(self.force_range, 'force')
-        self.force['negative_large'] = fuzz.trimf(self.force_range, [-10, -5, -2.5])
-        self.force['negative_small'] = fuzz.trimf(self.force_range, [-5, -2.5, 0])
-        self.force['zero'] = fuzz.trimf(self.force_range, [-2.5, 0, 2.5])
-        self.force['positive_small'] = fuzz.trimf(self.force_range, [0, 2.5, 5])
-        self.force['positive_large'] = fuzz.trimf(self.force_range, [2.5, 5, 10])
+        force_sets = [
+            ('negative_large', [-10, -5, -2.5]),
+            ('negative_small', [-5, -2.5, 0]),
+            ('zero', [-2.5, 0, 2.5]),
+            ('positive_small', [0, 2.5, 5]),
+            ('positive_large', [2.5, 5, 10]),
+        ]
         
         # Regras fuzzy - mais ênfase no controle próximo do equilíbrio
-        rules = []
-        
-        # Regras para ângulo negativo grande
-        rules.append(ctrl.Rule(self.angle['negative_large'] & self.angular_velocity['negative_large'], self.force['positive_large']))
-        rules.append(ctrl.Rule(self.angle['negative_large'] & self.angular_velocity['negative_small'], self.force['positive_large']))
-        rules.append(ctrl.Rule(self.angle['negative_large'] & self.angular_velocity['zero'], self.force['positive_small']))
-        rules.append(ctrl.Rule(self.angle['negative_large'] & self.angular_velocity['positive_small'], self.force['zero']))
-        rules.append(ctrl.Rule(self.angle['negative_large'] & self.angular_velocity['positive_large'], self.force['negative_small']))
-        
-        # Regras para ângulo negativo pequeno - mais suave
-        rules.append(ctrl.Rule(self.angle['negative_small'] & self.angular_velocity['negative_large'], self.force['positive_small']))
-        rules.append(ctrl.Rule(self.angle['negative_small'] & self.angular_velocity['negative_small'], self.force['positive_small']))
-        rules.append(ctrl.Rule(self.angle['negative_small'] & self.angular_velocity['zero'], self.force['positive_small']))
-        rules.append(ctrl.Rule(self.angle['negative_small'] & self.angular_velocity['positive_small'], self.force['zero']))
-        rules.append(ctrl.Rule(self.angle['negative_small'] & self.angular_velocity['positive_large'], self.force['negative_small']))
-        
-        # Regras para ângulo zero - controle mais preciso
-        rules.append(ctrl.Rule(self.angle['zero'] & self.angular_velocity['negative_large'], self.force['positive_small']))
-        rules.append(ctrl.Rule(self.angle['zero'] & self.angular_velocity['negative_small'], self.force['positive_small']))
-        rules.append(ctrl.Rule(self.angle['zero'] & self.angular_velocity['zero'], self.force['zero']))
-        rules.append(ctrl.Rule(self.angle['zero'] & self.angular_velocity['positive_small'], self.force['negative_small']))
-        rules.append(ctrl.Rule(self.angle['zero'] & self.angular_velocity['positive_large'], self.force['negative_small']))
-        
-        # Regras para ângulo positivo pequeno - mais suave
-        rules.append(ctrl.Rule(self.angle['positive_small'] & self.angular_velocity['negative_large'], self.force['positive_small']))
-        rules.append(ctrl.Rule(self.angle['positive_small'] & self.angular_velocity['negative_small'], self.force['zero']))
-        rules.append(ctrl.Rule(self.angle['positive_small'] & self.angular_velocity['zero'], self.force['negative_small']))
-        rules.append(ctrl.Rule(self.angle['positive_small'] & self.angular_velocity['positive_small'], self.force['negative_small']))
-        rules.append(ctrl.Rule(self.angle['positive_small'] & self.angular_velocity['positive_large'], self.force['negative_small']))
-        
-        # Regras para ângulo positivo grande
-        rules.append(ctrl.Rule(self.angle['positive_large'] & self.angular_velocity['negative_large'], self.force['positive_small']))
-        rules.append(ctrl.Rule(self.angle['positive_large'] & self.angular_velocity['negative_small'], self.force['zero']))
-        rules.append(ctrl.Rule(self.angle['positive_large'] & self.angular_velocity['zero'], self.force['negative_small']))
-        rules.append(ctrl.Rule(self.angle['positive_large'] & self.angular_velocity['positive_small'], self.force['negative_small']))
-        rules.append(ctrl.Rule(self.angle['positive_large'] & self.angular_velocity['positive_large'], self.force['negative_large']))
-        
-        # Sistema de controle
-        self.control_system = ctrl.ControlSystem(rules)
-        self.simulation = ctrl.ControlSystemSimulation(self.control_system)
+        # Linhas: conjunto do ângulo; colunas: conjunto da velocidade angular
+        rule_table = [
+            # Ângulo negativo grande
+            ['positive_large', 'positive_large', 'positive_small', 'zero', 'negative_small'],
+            # Ângulo negativo pequeno - mais suave
+            ['positive_small', 'positive_small', 'positive_small', 'zero', 'negative_small'],
+            # Ângulo zero - controle mais preciso
+            ['positive_small', 'positive_small', 'zero', 'negative_small', 'negative_small'],
+            # Ângulo positivo pequeno - mais suave
+            ['positive_small', 'zero', 'negative_small', 'negative_small', 'negative_small'],
+            # Ângulo positivo grande
+            ['positive_small', 'zero', 'negative_small', 'negative_small', 'negative_large'],
+        ]
+        
+        # Motor nativo: pertinências amostradas e matriz de regras como arrays
+        force_labels = [label for label, _ in force_sets]
+        rules = [(i, j, force_labels.index(rule_table[i][j]))
+                 for i in range(len(angle_sets)) for j in range(len(velocity_sets))]
+        system = {}
+        system['engine'] = MamdaniEngine(
+            [self.angle_range, self.angular_velocity_range],
+            [[trimf(self.angle_range, abc) for _, abc in angle_sets],
+             [trimf(self.angular_velocity_range, abc) for _, abc in velocity_sets]],
+            self.force_range,
+            [trimf(self.force_range, abc) for _, abc in force_sets],
+            rules
+        )
+        
+        # Sistema de controle do skfuzzy (caminho de referência/validação)
+        if self.backend == 'skfuzzy':
+            # skfuzzy.control importa o matplotlib: carregado só quando usado
+            import skfuzzy as fuzz
+            from skfuzzy import control as ctrl
+            
+            angle = ctrl.Antecedent(self.angle_range, 'angle')
+            for label, abc in angle_sets:
+                angle[label] = fuzz.trimf(self.angle_range, abc)
+            
+            angular_velocity = ctrl.Antecedent(self.angular_velocity_range, 'angular_velocity')
+            for label, abc in velocity_sets:
+                angular_velocity[label] = fuzz.trimf(self.angular_velocity_range, abc)
+            
+            force = ctrl.Consequent(self.force_range, 'force')
+            for label, abc in force_sets:
+                force[label] = fuzz.trimf(self.force_range, abc)
+            
+            skfuzzy_rules = []
+            for i, (angle_label, _) in enumerate(angle_sets):
+                for j, (velocity_label, _) in enumerate(velocity_sets):
+                    skfuzzy_rules.append(ctrl.Rule(angle[angle_label] & angular_velocity[velocity_label],
+                                                   force[rule_table[i][j]]))
+            
+            system.update(angle=angle, angular_velocity=angular_velocity, force=force,
+                          control_system=ctrl.ControlSystem(skfuzzy_rules))
+        
+        return system
+    
+    def set_compiled(self, compiled, table_resolution=None):
+        """Ativa ou desativa o modo compilado (tabela de consulta)"""
+        if table_resolution is not None:
+            _check_resolution(table_resolution)
+            self.table_resolution = table_resolution
+        self.compiled = compiled
+        if compiled:
+            self._compile_lookup_table()
+        else:
+            self.lookup_table = None
+            self.compiled_max_error = None
+    
+    def _sample_rule_base(self, angles, angular_velocities):
+        """
+        Avalia o sistema fuzzy exato (sem ganho) em vários pontos de uma só vez.
+        Pontos onde nenhuma regra dispara recebem força zero, como em compute_control.
+        """
+        output = self.engine.compute(np.ravel(angles), np.ravel(angular_velocities))
+        return np.nan_to_num(output, nan=0.0)
+    
+    def _compile_lookup_table(self):
+        """Compila a tabela de consulta, reaproveitando do cache uma tabela do mesmo sistema e resolução"""
+        key = parameter_key('fis-table', self._system_key, self.table_resolution)
+        table = SYSTEM_CACHE.get(key)
+        if table is None:
+            self._build_lookup_table()
+            SYSTEM_CACHE.put(key, {name: getattr(self, name) for name in _TABLE_ATTRIBUTES})
+        else:
+            for name, value in table.items():
+                setattr(self, name, value)
+    
+    def _live_interval(self, index):
+        """
+        Intervalo aberto (low, high) da entrada `index` em que algum conjunto
+        tem pertinência positiva. Como a tabela de regras cobre todas as
+        combinações de conjuntos, nenhuma regra dispara exatamente quando o
+        ângulo ou a velocidade angular (já limitados ao universo) está fora
+        desse intervalo.
+        """
+        universe = self.engine.input_universes[index]
+        alive = np.flatnonzero(np.any(self.engine.input_terms[index] > 0, axis=0))
+        low = universe[alive[0] - 1] if alive[0] > 0 else -np.inf
+        high = universe[alive[-1] + 1] if alive[-1] + 1 < universe.size else np.inf
+        return float(low), float(high)
+    
+    def _build_lookup_table(self):
+        """
+        Amostra a base de regras em uma grade regular e mede o erro máximo da
+        interpolação bilinear em uma amostra densa fora dos nós da grade.
+        
+        Nas bordas em que nenhuma regra dispara, a saída exata salta para a
+        força zero (a mesma do skfuzzy sem saída). Os nós da grade sobre essas
+        bordas guardam o limite da saída vindo de dentro, e a consulta devolve
+        zero para entradas sobre elas, sem interpolar através do salto.
+        """
+        n = self.table_resolution
+        self.table_angles = np.linspace(self.angle_range[0], self.angle_range[-1], n)
+        self.table_velocities = np.linspace(self.angular_velocity_range[0], self.angular_velocity_range[-1], n)
+        self._table_live = self._live_interval(0) + self._live_interval(1)
+        
+        # Nós sem regra disparando são amostrados logo dentro da região ativa
+        angle_margin = 1e-6 * (self.table_angles[1] - self.table_angles[0])
+        velocity_margin = 1e-6 * (self.table_velocities[1] - self.table_velocities[0])
+        sample_angles = np.clip(self.table_angles, self._table_live[0] + angle_margin,
+                                self._table_live[1] - angle_margin)
+        sample_velocities = np.clip(self.table_velocities, self._table_live[2] + velocity_margin,
+                                    self._table_live[3] - velocity_margin)
+        angle_grid, velocity_grid = np.meshgrid(sample_angles, sample_velocities, indexing='ij')
+        self.lookup_table = self._sample_rule_base(angle_grid, velocity_grid).reshape(n, n)
+        
+        # Constantes para a consulta escalar rápida (sem overhead do NumPy)
+        self._table_rows = self.lookup_table.tolist()
+        self._table_bounds = (float(self.table_angles[0]), float(self.table_angles[-1]),
+                              float(self.table_velocities[0]), float(self.table_velocities[-1]))
+        self._table_origin = (self._table_bounds[0], self._table_bounds[2])
+        self._table_scale = ((n - 1) / (self.table_angles[-1] - self.table_angles[0]),
+                             (n - 1) / (self.table_velocities[-1] - self.table_velocities[0]))
+        
+        # Erro máximo (antes do ganho) em relação ao sistema exato, medido em
+        # ERROR_OVERSAMPLE pontos por célula e por eixo, nenhum sobre os nós
+        points = min(ERROR_OVERSAMPLE * (n - 1), ERROR_MAX_POINTS)
+        fractions = (np.arange(points) + 0.5) / points
+        error_angles = self.table_angles[0] + fractions * (self.table_angles[-1] - self.table_angles[0])
+        error_velocities = self.table_velocities[0] + fractions * (self.table_velocities[-1] - self.table_velocities[0])
+        error_angle_grid, error_velocity_grid = np.meshgrid(error_angles, error_velocities, indexing='ij')
+        exact = self._sample_rule_base(error_angle_grid, error_velocity_grid)
+        interpolated = self._interpolate_batch(error_angle_grid.ravel(), error_velocity_grid.ravel())
+        self.compiled_max_error = float(np.max(np.abs(interpolated - exact)))
+    
+    def _interpolate(self, angle, angular_velocity):
+        """Interpolação bilinear na tabela compilada (entradas já limitadas); zero onde nenhuma regra dispara"""
+        live = self._table_live
+        if not (live[0] < angle < live[1] and live[2] < angular_velocity < live[3]):
+            return 0.0
+        last = self.table_resolution - 2
+        u = (angle - self._table_origin[0]) * self._table_scale[0]
+        w = (angular_velocity - self._table_origin[1]) * self._table_scale[1]
+        i = min(max(int(u), 0), last)
+        j = min(max(int(w), 0), last)
+        du = u - i
+        dw = w - j
+        row0 = self._table_rows[i]
+        row1 = self._table_rows[i + 1]
+        return ((row0[j] * (1 - dw) + row0[j + 1] * dw) * (1 - du)
+                + (row1[j] * (1 - dw) + row1[j + 1] * dw) * du)
+    
+    def _interpolate_batch(self, angles, angular_velocities):
+        """Versão vetorizada de _interpolate para arrays de entradas já limitadas"""
+        last = self.table_resolution - 2
+        u = (angles - self._table_origin[0]) * self._table_scale[0]
+        w = (angular_velocities - self._table_origin[1]) * self._table_scale[1]
+        i = np.clip(u.astype(int), 0, last)
+        j = np.clip(w.astype(int), 0, last)
+        du = u - i
+        dw = w - j
+        table = self.lookup_table
+        force = ((table[i, j] * (1 - dw) + table[i, j + 1] * dw) * (1 - du)
+                 + (table[i + 1, j] * (1 - dw) + table[i + 1, j + 1] * dw) * du)
+        live = self._table_live
+        dead = ((angles <= live[0]) | (angles >= live[1])
+                | (angular_velocities <= live[2]) | (angular_velocities >= live[3]))
+        force[dead] = 0.0
+        return force
     
     def update_parameters(self, gain=None, angle_range=None, velocity_range=None, force_range=None):
-        """Atualiza os parâmetros do controlador"""
+        """
+        Atualiza os parâmetros do controlador.
+        
+        O ganho é aplicado sobre a saída defuzzificada (inclusive na tabela
+        compilada), então mudá-lo não exige reconstruir nada; o sistema fuzzy
+        só é reconstruído quando algum universo de fato muda.
+        """
         if gain is not None:
             self.gain = gain
+        
+        universes = {}
         if angle_range is not None:
-            self.angle_range = np.arange(-angle_range, angle_range, 0.01)
+            universes['angle_range'] = np.arange(-angle_range, angle_range, 0.01)
         if velocity_range is not None:
-            self.angular_velocity_range = np.arange(-velocity_range, velocity_range, 0.1)
+            universes['angular_velocity_range'] = np.arange(-velocity_range, velocity_range, 0.1)
         if force_range is not None:
-            self.force_range = np.arange(-force_range, force_range, 0.1)
+            universes['force_range'] = np.arange(-force_range, force_range, 0.1)
+        changed = {name: universe for name, universe in universes.items()
+                   if not np.array_equal(universe, getattr(self, name))}
         
-        # Reinicializa o sistema fuzzy com os novos parâmetros
-        self._initialize_fuzzy_system()
+        if changed:
+            for name, universe in changed.items():
+                setattr(self, name, universe)
+            # Reinicializa o sistema fuzzy com os novos parâmetros
+            self._initialize_fuzzy_system()
     
     def compute_control(self, angle, angular_velocity):
         """
         Computa a força de controle baseada no ângulo e velocidade angular
         """
         try:
+            if self.compiled:
+                # Caminho rápido: limites e interpolação em Python puro
+                angle = min(max(float(angle), self._table_bounds[0]), self._table_bounds[1])
+                angular_velocity = min(max(float(angular_velocity), self._table_bounds[2]), self._table_bounds[3])
+                force = self._interpolate(angle, angular_velocity) * self.gain
+                return min(max(force, -20.0), 20.0)
+            
             # Garante que as entradas estejam dentro dos ranges definidos
             angle = float(np.clip(angle, self.angle_range[0], self.angle_range[-1]))
             angular_velocity = float(np.clip(angular_velocity, self.angular_velocity_range[0], self.angular_velocity_range[-1]))
             
+            if self.backend == 'numpy':
+                force = float(self.engine.compute(angle, angular_velocity))
+                if np.isnan(force):
+                    print("Aviso: saída 'force' não encontrada no sistema fuzzy.")
+                    return 0.0
+                return np.clip(force * self.gain, -20, 20)
+            
             self.simulation.input['angle'] = angle
             self.simulation.input['angular_velocity'] = angular_velocity
             self.simulation.compute()
@@ -118,4 +344,28 @@ class FISController:
                 return 0.0
         except Exception as e:
             print(f"Erro no controlador FIS: {str(e)}")
-            return 0.0  # Retorna força zero em caso de erro 
\ No newline at end of file
+            return 0.0  # Retorna força zero em caso de erro 
+    
+    def compute_control_batch(self, angles, angular_velocities):
+        """
+        Computa a força de controle para N estados de uma só vez.
+        
+        O lote é sempre avaliado de forma vetorizada (tabela compilada ou motor
+        nativo, que reproduz o skfuzzy), independentemente do backend escalar.
+        
+        Args:
+            angles (np.ndarray): Ângulos dos N estados
+            angular_velocities (np.ndarray): Velocidades angulares dos N estados
+            
+        Returns:
+            np.ndarray: Forças de controle (N,)
+        """
+        angles = np.clip(np.asarray(angles, dtype=float), self.angle_range[0], self.angle_range[-1])
+        angular_velocities = np.clip(np.asarray(angular_velocities, dtype=float),
+                                     self.angular_velocity_range[0], self.angular_velocity_range[-1])
+        
+        if self.compiled:
+            force = self._interpolate_batch(angles, angular_velocities)
+        else:
+            force = self._sample_rule_base(angles, angular_velocities).reshape(angles.shape)
+        return np.clip(force * self.gain, -20, 20)
@@ -0,0 +1,122 @@
+"""
+Memoização dos sistemas fuzzy construídos e do fitness dos indivíduos.
+
+Construir um sistema fuzzy (pertinências amostradas, regras, tabela compilada
+e, no backend skfuzzy, os objetos ctrl.Rule) custa bem mais que consultá-lo.
+Os controladores guardam o que constroem em caches LRU limitados, com a
+chave calculada por parameter_key a partir de todos os parâmetros que
+definem o sistema, de modo que reconstruir com parâmetros já vistos (uma
+configuração da interface repetida, um indivíduo da elite que volta a ser o
+melhor) não custa nada. O fitness de cada indivíduo também fica em cache,
+com a chave incluindo os casos de teste e os parâmetros da avaliação.
+"""
+import collections
+import hashlib
+import threading
+
+import numpy as np
+
+
+def _update_digest(digest, value):
+    """Acrescenta ao hash uma representação canônica (tipo + conteúdo) de `value`"""
+    if isinstance(value, (np.ndarray, np.generic)):
+        array = np.ascontiguousarray(value)
+        digest.update(f"a{array.dtype.str}{array.shape}".encode())
+        digest.update(memoryview(array).cast('B'))
+    elif isinstance(value, dict):
+        digest.update(f"d{len(value)}".encode())
+        for key in sorted(value, key=str):
+            _update_digest(digest, key)
+            _update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"l{len(value)}".encode())
+        for item in value:
+            _update_digest(digest, item)
+    else:
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+
+
+def parameter_key(*parts):
+    """
+    Chave canônica (hex) de um conjunto de parâmetros: escalares, strings,
+    arrays NumPy e dicionários/listas deles. Arrays iguais dão a mesma chave
+    independentemente de serem cópias; a ordem das chaves dos dicionários
+    não importa.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _update_digest(digest, parts)
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """
+    Cache limitado que descarta o item usado há mais tempo, com contadores.
+    Pode ser usado por várias threads (a evolução em segundo plano da
+    interface compartilha os caches com a janela).
+    """
+
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Valor da chave (marcado como usado agora), ou `default`"""
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Guarda o valor, descartando os menos usados além da capacidade"""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_build(self, key, build):
+        """Valor da chave; se não estiver no cache, chama build() e guarda o resultado"""
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Esvazia o cache e zera os contadores"""
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Contadores: acertos, faltas, descartes, tamanho, capacidade e taxa de acerto"""
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._items), 'capacity': self.capacity,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+
+# Caches compartilhados pelos controladores do processo
+SYSTEM_CACHE = LRUCache(64)      # sistemas fuzzy construídos (e tabelas compiladas)
+FITNESS_CACHE = LRUCache(4096)   # fitness dos indivíduos do Genetic-Fuzzy
+
+
+def cache_stats():
+    """Contadores dos dois caches: {'systems': ..., 'fitness': ...}"""
+    return {'systems': SYSTEM_CACHE.stats(), 'fitness': FITNESS_CACHE.stats()}
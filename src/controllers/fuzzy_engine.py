@@ -0,0 +1,265 @@
+"""
+Motor de inferência Mamdani vetorizado em NumPy.
+
+Reproduz a semântica do skfuzzy.control usada pelos controladores do projeto
+(AND pelo mínimo, acumulação pelo máximo e defuzzificação pelo centroide sobre
+o universo reamostrado nos pontos de corte), mas guarda as funções de
+pertinência e a matriz de regras como arrays e avalia muitas entradas de uma
+só vez, sem construir grafos de objetos a cada chamada.
+"""
+import numpy as np
+
+
+def trimf(x, abc):
+    """Função de pertinência triangular (mesma definição do skfuzzy)"""
+    a, b, c = abc
+    x = np.asarray(x, dtype=float)
+    y = np.zeros(x.shape)
+    if a != b:
+        left = (a < x) & (x < b)
+        y[left] = (x[left] - a) / float(b - a)
+    if b != c:
+        right = (b < x) & (x < c)
+        y[right] = (c - x[right]) / float(c - b)
+    y[x == b] = 1
+    return y
+
+
+def gaussmf(x, mean, sigma):
+    """Função de pertinência gaussiana (mesma definição do skfuzzy)"""
+    return np.exp(-((np.asarray(x, dtype=float) - mean) ** 2.) / (2 * sigma ** 2.))
+
+
+def sampled_gaussmf(values, universe, centers, widths):
+    """
+    Pertinência de `values` a gaussianas amostradas no universo discreto.
+
+    Equivale a np.interp(values, universe, gaussmf(universe, c, w)) para cada
+    conjunto (fuzzificação do skfuzzy), mas só avalia a gaussiana nos dois
+    pontos do universo vizinhos de cada valor, com broadcast entre os lotes.
+
+    Args:
+        values (np.ndarray): Entradas (..., T), já limitadas ao universo
+        universe (np.ndarray): Universo de discurso crescente
+        centers (np.ndarray): Centros (..., n_conjuntos)
+        widths (np.ndarray): Larguras (..., n_conjuntos)
+
+    Returns:
+        np.ndarray: Pertinências (..., T, n_conjuntos)
+    """
+    index = np.clip(np.searchsorted(universe, values, side='right') - 1, 0, universe.size - 2)
+    left = universe[index][..., None]
+    right = universe[index + 1][..., None]
+    fraction = ((values[..., None] - left) / (right - left))
+    centers = np.expand_dims(centers, -2)
+    widths = np.expand_dims(widths, -2)
+    return gaussmf(left, centers, widths) * (1 - fraction) + gaussmf(right, centers, widths) * fraction
+
+
+class MamdaniEngine:
+    def __init__(self, input_universes, input_terms, output_universe, output_terms, rules):
+        """
+        Args:
+            input_universes (list): Universo de discurso (array 1-D) de cada entrada
+            input_terms (list): Para cada entrada, matriz (n_termos, len(universo))
+                com as pertinências amostradas de cada termo
+            output_universe (np.ndarray): Universo de discurso da saída
+            output_terms (np.ndarray): Matriz (n_termos, len(universo)) da saída
+            rules (np.ndarray): Matriz inteira (n_regras, n_entradas + 1) com o
+                índice do termo de cada entrada e, na última coluna, o termo de saída
+        """
+        self.input_universes = [np.asarray(u, dtype=float) for u in input_universes]
+        self.input_terms = [np.atleast_2d(np.asarray(t, dtype=float)) for t in input_terms]
+        self.output_universe = np.asarray(output_universe, dtype=float)
+        self.output_terms = np.atleast_2d(np.asarray(output_terms, dtype=float))
+        self.rules = np.asarray(rules, dtype=int).reshape(-1, len(self.input_universes) + 1)
+
+        # Apenas termos de saída usados por alguma regra participam da agregação
+        self.active_terms = np.unique(self.rules[:, -1])
+        self.rule_term_mask = self.rules[:, -1][:, None] == self.active_terms[None, :]
+        self._prepared_output = prepare_output_terms(self.output_universe, self.output_terms[self.active_terms])
+
+        # Limites das entradas (o skfuzzy limita as entradas ao universo)
+        self.input_bounds = [(u.min(), u.max()) for u in self.input_universes]
+
+    def fuzzify(self, index, values):
+        """Pertinência de cada valor (N,) a cada termo da entrada `index`: (N, n_termos)"""
+        universe = self.input_universes[index]
+        low, high = self.input_bounds[index]
+        values = np.clip(values, low, high)
+        return np.stack([np.interp(values, universe, mf) for mf in self.input_terms[index]], axis=1)
+
+    def firing_strengths(self, *inputs):
+        """Grau de disparo de cada regra: (N, n_regras)"""
+        strengths = None
+        for index, values in enumerate(inputs):
+            memberships = self.fuzzify(index, values)[:, self.rules[:, index]]
+            strengths = memberships if strengths is None else np.fmin(strengths, memberships)
+        return strengths
+
+    def compute(self, *inputs):
+        """
+        Avalia o sistema para entradas escalares ou arrays (com broadcast).
+
+        Returns:
+            np.ndarray: Saída defuzzificada com o formato das entradas; NaN onde
+                nenhuma regra dispara (caso em que o skfuzzy não gera saída)
+        """
+        arrays = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in inputs])
+        shape = arrays[0].shape
+        strengths = self.firing_strengths(*[a.ravel() for a in arrays])
+
+        # Acumulação: corte de cada termo de saída = máximo dos disparos das suas regras
+        cuts = np.where(self.rule_term_mask[None, :, :], strengths[:, :, None], 0.0).max(axis=1)
+        return self.defuzzify(cuts).reshape(shape)
+
+    def defuzzify(self, cuts):
+        """Centroide da saída agregada para cortes (N, n_termos_ativos)"""
+        return centroid_defuzzify(self.output_universe, self.output_terms[self.active_terms], cuts,
+                                  self._prepared_output)
+
+
+def prepare_output_terms(x, terms):
+    """
+    Pré-calcula o que centroid_defuzzify precisa saber dos termos de saída
+    (pesos dos trapézios e, para termos unimodais, as partes crescente e
+    decrescente), para não repetir esse trabalho a cada avaliação.
+    """
+    profiles = []
+    for mf in terms:
+        peak = int(np.argmax(mf))
+        rising = mf[:peak + 1]
+        falling = mf[peak:][::-1]
+        unimodal = np.all(np.diff(rising) >= 0) and np.all(np.diff(falling) >= 0)
+        profiles.append((peak, rising, falling) if unimodal else None)
+    return {'dx': np.diff(x), 'weights': _trapezoid_weights(x), 'profiles': profiles}
+
+
+def centroid_defuzzify(x, terms, cuts, prepared=None):
+    """
+    Centroide da saída agregada de N avaliações.
+
+    Como no skfuzzy, o universo é reamostrado nos pontos em que cada termo
+    cruza o seu nível de corte e a área é integrada por trapézios. Termos com
+    corte zero não alteram o resultado (seus cruzamentos coincidem, a menos de
+    arredondamento, com pontos do universo), de modo que termos não usados podem receber corte 0.
+
+    Args:
+        x (np.ndarray): Universo de discurso da saída
+        terms (np.ndarray): Pertinências dos termos de saída (n_termos, len(x))
+        cuts (np.ndarray): Nível de corte de cada termo (N, n_termos)
+        prepared (dict): Resultado de prepare_output_terms(x, terms), opcional
+
+    Returns:
+        np.ndarray: Saídas (N,); NaN onde a saída agregada é vazia
+    """
+    if prepared is None:
+        prepared = prepare_output_terms(x, terms)
+    n = cuts.shape[0]
+    dx = prepared['dx']
+
+    # Saída agregada (máximo dos termos cortados) nos pontos do universo
+    aggregated = np.minimum(cuts[:, :1], terms[0])
+    clipped = np.empty_like(aggregated)
+    for k in range(1, len(terms)):
+        np.minimum(cuts[:, k:k + 1], terms[k], out=clipped)
+        np.maximum(aggregated, clipped, out=aggregated)
+
+    # Área e momento são lineares nas alturas: somas dos trapézios como produtos
+    area_weights, moment_weights = prepared['weights']
+    total_area = aggregated @ area_weights
+    total_moment = aggregated @ moment_weights
+
+    # Saída vazia: todas as alturas nulas (todos os pesos de área são positivos)
+    empty = total_area == 0
+
+    # Pontos em que cada termo cruza o seu nível de corte (no máximo alguns por
+    # linha): apenas os segmentos que os contêm precisam ser refinados
+    crossings = [_cut_crossings(x, dx, mf, profile, cuts[:, k])
+                 for k, (mf, profile) in enumerate(zip(terms, prepared['profiles']))]
+    rows = np.concatenate([c[0] for c in crossings])
+    segments = np.concatenate([c[1] for c in crossings])
+    points = np.concatenate([c[2] for c in crossings])
+    if rows.size:
+        # Agrupa os cruzamentos por (linha, segmento)
+        keys, group = np.unique(rows * dx.size + segments, return_inverse=True)
+        group_rows, group_segments = np.divmod(keys, dx.size)
+        counts = np.bincount(group, minlength=keys.size)
+        order = np.argsort(group, kind='stable')
+        rank = np.arange(order.size) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        # Subgrade de cada segmento: extremos + cruzamentos (posições vazias
+        # repetem o extremo direito e formam segmentos de largura zero)
+        left = x[group_segments]
+        width = dx[group_segments]
+        subgrid = np.repeat((left + width)[:, None], counts.max() + 2, axis=1)
+        subgrid[:, 0] = left
+        subgrid[group[order], rank + 1] = points[order]
+        subgrid.sort(axis=1)
+
+        # Saída agregada na subgrade (interpolação linear dentro do segmento)
+        fraction = (subgrid - left[:, None]) / width[:, None]
+        values = np.zeros(subgrid.shape)
+        for k, mf in enumerate(terms):
+            segment_mf = (mf[group_segments][:, None] * (1 - fraction)
+                          + mf[group_segments + 1][:, None] * fraction)
+            np.maximum(values, np.minimum(cuts[group_rows, k][:, None], segment_mf), out=values)
+
+        # Substitui a contribuição dos segmentos refinados
+        sub_dx = np.diff(subgrid, axis=1)
+        sub_area = 0.5 * sub_dx * (values[:, :-1] + values[:, 1:])
+        sub_moment = sub_dx * sub_dx * (2.0 * values[:, 1:] + values[:, :-1]) / 6.0 + subgrid[:, :-1] * sub_area
+        y1 = aggregated[group_rows, group_segments]
+        y2 = aggregated[group_rows, group_segments + 1]
+        area = 0.5 * width * (y1 + y2)
+        moment = width * width * (2.0 * y2 + y1) / 6.0 + left * area
+        total_area += np.bincount(group_rows, sub_area.sum(axis=1) - area, minlength=n)
+        total_moment += np.bincount(group_rows, sub_moment.sum(axis=1) - moment, minlength=n)
+
+    output = total_moment / np.fmax(total_area, np.finfo(float).eps)
+    output[empty] = np.nan
+    return output
+
+
+def _trapezoid_weights(x):
+    """
+    Pesos w tais que a soma das áreas (ou dos momentos em relação à origem) dos
+    trapézios da curva y sobre a grade x é y @ w.
+    """
+    dx = np.diff(x)
+    area_weights = np.zeros(x.size)
+    area_weights[:-1] += 0.5 * dx
+    area_weights[1:] += 0.5 * dx
+    moment_weights = np.zeros(x.size)
+    moment_weights[:-1] += dx * dx / 6.0 + 0.5 * x[:-1] * dx
+    moment_weights[1:] += dx * dx / 3.0 + 0.5 * x[:-1] * dx
+    return area_weights, moment_weights
+
+
+def _cut_crossings(x, dx, mf, profile, cuts):
+    """
+    Cruzamentos de um termo com os seus níveis de corte, como em
+    skfuzzy.fuzzymath._interp_universe_fast (nível zero usa `>`).
+
+    Returns:
+        tuple: (linha, segmento, ponto) de cada cruzamento
+    """
+    if profile is not None:
+        # Termo unimodal: no máximo uma subida e uma descida por nível
+        peak, rising, falling = profile
+        # Nível zero conta pertinências > 0: equivale ao menor nível positivo
+        levels = np.maximum(cuts, np.finfo(float).tiny)
+        first = np.searchsorted(rising, levels)
+        last = peak + falling.size - 1 - np.searchsorted(falling, levels)
+        has_support = first <= peak
+        rise = has_support & (first > 0)
+        fall = has_support & (last < x.size - 1)
+        rows = np.concatenate((np.flatnonzero(rise), np.flatnonzero(fall)))
+        segments = np.concatenate((first[rise] - 1, last[fall]))
+    else:
+        above = np.where(cuts[:, None] == 0, mf[None, :] > 0, mf[None, :] >= cuts[:, None])
+        rows, segments = np.nonzero(above[:, 1:] != above[:, :-1])
+
+    points = (x[segments] + (cuts[rows] - mf[segments]) * dx[segments]
+              / (mf[segments + 1] - mf[segments]))
+    return rows, segments, points
@@ -1,91 +1,391 @@
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
-import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from src.controllers.fuzzy_cache import FITNESS_CACHE, SYSTEM_CACHE, parameter_key
+from src.controllers.fuzzy_engine import (MamdaniEngine, centroid_defuzzify, gaussmf, prepare_output_terms,
+                                          sampled_gaussmf, trimf)
+from src.simulation.batch_pendulum_sim import BatchPendulumSimulation
+
+# Conjuntos fuzzy para força
+FORCE_SETS = [
+    ('negative', [-20, -10, 0]),
+    ('zero', [-10, 0, 10]),
+    ('positive', [0, 10, 20]),
+]
+
+# Layout do genoma: cada indivíduo é uma linha de uma matriz (P, GENOME_SIZE)
+# com os campos abaixo em sequência, e cada campo tem os limites da
+# inicialização uniforme e o desvio do ruído da mutação
+GENOME_LAYOUT = (
+    # (campo, tamanho, limites iniciais, desvio da mutação)
+    ('angle_centers', 5, (-np.pi/2, np.pi/2), 0.1),     # Centros dos conjuntos fuzzy para ângulo
+    ('angle_widths', 5, (0.1, np.pi/4), 0.05),          # Larguras dos conjuntos fuzzy para ângulo
+    ('velocity_centers', 5, (-5, 5), 0.1),              # Centros dos conjuntos para velocidade angular
+    ('velocity_widths', 5, (0.5, 2.5), 0.05),           # Larguras dos conjuntos para velocidade angular
+    ('rule_weights', 25, (-1, 1), 0.2),                 # Pesos das regras
+)
+_FIELD_SIZES = [size for _, size, _, _ in GENOME_LAYOUT]
+_FIELD_STARTS = np.cumsum([0] + _FIELD_SIZES)[:-1].tolist()
+GENOME_SLICES = {name: slice(start, start + size)
+                 for (name, size, _, _), start in zip(GENOME_LAYOUT, _FIELD_STARTS)}
+GENOME_SIZE = sum(_FIELD_SIZES)
+
+# Limites de cada campo depois do crossover e da mutação. As larguras têm um
+# mínimo positivo para as gaussianas continuarem válidas (largura zero gera
+# divisão por zero e larguras muito pequenas, conjuntos que nunca disparam)
+GENOME_LIMITS = {
+    'angle_centers': (-np.pi, np.pi),
+    'angle_widths': (0.02, np.pi),
+    'velocity_centers': (-10, 10),
+    'velocity_widths': (0.1, 10),
+    'rule_weights': (-2, 2),
+}
+
+# Campo de cada coluna, desvio da mutação e limites por coluna
+GENOME_FIELD_INDEX = np.repeat(np.arange(len(GENOME_LAYOUT)), _FIELD_SIZES)
+MUTATION_SCALES = np.repeat([scale for _, _, _, scale in GENOME_LAYOUT], _FIELD_SIZES)
+GENOME_LOWER = np.repeat([GENOME_LIMITS[name][0] for name, _, _, _ in GENOME_LAYOUT], _FIELD_SIZES)
+GENOME_UPPER = np.repeat([GENOME_LIMITS[name][1] for name, _, _, _ in GENOME_LAYOUT], _FIELD_SIZES)
+
+# Adaptação do passo da mutação pela regra de 1/5 de sucesso: o passo cresce
+# quando mais de 1/5 dos filhos supera o melhor dos pais e diminui caso contrário
+SUCCESS_TARGET = 0.2
+STEP_ADAPTATION = 0.82
+STEP_LIMITS = (0.05, 5.0)
+
+# Pesos padrão do custo das simulações em malha fechada (rollout_fitness)
+ROLLOUT_WEIGHTS = {
+    'upright': 10.0,     # Fração do horizonte com o pêndulo caído
+    'angle_itae': 1.0,   # Integral de t * |ângulo|
+    'cart_itae': 0.1,    # Integral de t * |posição do carrinho|
+    'effort': 1e-4,      # Integral de força^2
+}
+
+def individual_rules(individual):
+    """
+    Regras fuzzy: uma por par (conjunto de ângulo, conjunto de velocidade);
+    o sinal do peso escolhe a força positiva ou negativa
+    """
+    weights = individual['rule_weights']
+    return [(i, j, 2 if weights[i * 5 + j] > 0 else 0)
+            for i in range(5) for j in range(5)]
+
+def build_engine(individual, angle_range, angular_velocity_range, force_range):
+    """Constrói o motor de inferência nativo com os parâmetros de um indivíduo"""
+    return MamdaniEngine(
+        [angle_range, angular_velocity_range],
+        [[gaussmf(angle_range, center, width) for center, width in
+          zip(individual['angle_centers'], individual['angle_widths'])],
+         [gaussmf(angular_velocity_range, center, width) for center, width in
+          zip(individual['velocity_centers'], individual['velocity_widths'])]],
+        force_range,
+        [trimf(force_range, abc) for _, abc in FORCE_SETS],
+        individual_rules(individual)
+    )
+
+def evaluate_individual_fitness(individual, test_cases, angle_range, angular_velocity_range, force_range):
+    """
+    Avalia o fitness de um indivíduo sem efeitos colaterais.
+    
+    Função de módulo para poder ser executada em processos de trabalho.
+    Equivale a chamar compute_control caso a caso com o sistema do indivíduo.
+    """
+    try:
+        engine = build_engine(individual, angle_range, angular_velocity_range, force_range)
+        cases = np.asarray(test_cases, dtype=float).reshape(-1, 3)
+        angles = cases[:, 0]
+        velocities = np.clip(cases[:, 1], -10, 10)
+        force = np.clip(np.nan_to_num(engine.compute(angles, velocities), nan=0.0), -20, 20)
+        
+        # Penaliza o desvio do pêndulo e do carrinho
+        # Aqui, supomos que o objetivo é manter o pêndulo em pé (angle ~ 0) e o carrinho no centro (posição ~ 0)
+        # Como não temos a posição do carrinho no teste, penalizamos apenas o ângulo e a força aplicada
+        total_error = np.sum(np.abs(angles) + 0.1 * np.abs(force))  # Peso maior para o ângulo
+        # Fitness é o inverso do erro total
+        return float(1.0 / (1.0 + total_error))
+        
+    except Exception as e:
+        print(f"Erro na avaliação do fitness: {str(e)}")
+        return 0.0
+
+def genome_fields(genomes):
+    """
+    Campos de um genoma (GENOME_SIZE,) ou de uma matriz de genomas
+    (P, GENOME_SIZE) como um dicionário de vistas (sem cópia): um indivíduo
+    {'angle_centers': (5,), ...} ou a população empilhada
+    {'angle_centers': (P, 5), ..., 'rule_weights': (P, 25)}
+    """
+    return {name: genomes[..., GENOME_SLICES[name]] for name, _, _, _ in GENOME_LAYOUT}
+
+def individual_genome(individual):
+    """Genoma (GENOME_SIZE,) de um indivíduo no formato de dicionário"""
+    return np.concatenate([np.asarray(individual[name], dtype=float) for name, _, _, _ in GENOME_LAYOUT])
+
+def population_forces(genomes, angles, angular_velocities, angle_range, angular_velocity_range,
+                      force_range, chunk_size=1024):
+    """
+    Forças de controle de P indivíduos em T estados em uma única computação
+    vetorizada, sem construir sistemas fuzzy.
+    
+    Reproduz compute_control de cada indivíduo: as gaussianas são avaliadas nos
+    pontos do universo vizinhos de cada entrada e interpoladas (como na
+    fuzzificação sobre o universo amostrado), os disparos das 25 regras são
+    agregados nos termos positivo/negativo e o centroide é calculado em blocos
+    de `chunk_size` avaliações para limitar a memória.
+    
+    Args:
+        genomes (dict): População empilhada (ver genome_fields)
+        angles (np.ndarray): Ângulos (T,) comuns a todos ou (P, T)
+        angular_velocities (np.ndarray): Velocidades angulares (T,) ou (P, T)
+        
+    Returns:
+        np.ndarray: Forças (P, T)
+    """
+    num_individuals = genomes['rule_weights'].shape[0]
+    angles = np.asarray(angles, dtype=float)
+    shape = (num_individuals, angles.shape[-1])
+    angles = np.clip(np.broadcast_to(angles, shape), angle_range[0], angle_range[-1])
+    angular_velocities = np.clip(np.broadcast_to(np.asarray(angular_velocities, dtype=float), shape),
+                                 max(-10, angular_velocity_range[0]), min(10, angular_velocity_range[-1]))
+    
+    # Pertinências (P, T, 5) e disparo das regras (P, T, 25) pelo mínimo
+    angle_memberships = sampled_gaussmf(angles, angle_range, genomes['angle_centers'], genomes['angle_widths'])
+    velocity_memberships = sampled_gaussmf(angular_velocities, angular_velocity_range,
+                                           genomes['velocity_centers'], genomes['velocity_widths'])
+    strengths = np.fmin(angle_memberships[..., :, None], velocity_memberships[..., None, :]).reshape(shape + (25,))
+    
+    # Cortes dos termos de saída pelo máximo ('zero' não tem regras: corte 0)
+    positive = (genomes['rule_weights'] > 0)[:, None, :]
+    cuts = np.zeros(shape + (len(FORCE_SETS),))
+    cuts[..., 0] = np.where(positive, 0.0, strengths).max(axis=-1)
+    cuts[..., 2] = np.where(positive, strengths, 0.0).max(axis=-1)
+    
+    # Centroide em blocos
+    force_terms = np.array([trimf(force_range, abc) for _, abc in FORCE_SETS])
+    prepared = prepare_output_terms(force_range, force_terms)
+    cuts = cuts.reshape(-1, len(FORCE_SETS))
+    force = np.empty(cuts.shape[0])
+    for start in range(0, cuts.shape[0], chunk_size):
+        force[start:start + chunk_size] = centroid_defuzzify(force_range, force_terms,
+                                                             cuts[start:start + chunk_size], prepared)
+    
+    # Estados em que nenhuma regra dispara recebem força zero
+    return np.clip(np.nan_to_num(force, nan=0.0), -20, 20).reshape(shape)
+
+def rollout_fitness(genomes, initial_states, angle_range, angular_velocity_range, force_range,
+                    horizon=5.0, dt=0.01, fall_angle=np.pi/4, cart_limit=10.0, weights=None, **plant):
+    """
+    Fitness em malha fechada: simula cada indivíduo a partir de cada condição
+    inicial e pontua o tempo em pé, o ITAE do ângulo e da posição do carrinho
+    e o esforço de controle.
+    
+    Todas as P x B simulações avançam juntas em um BatchPendulumSimulation e as
+    forças de todas as simulações ativas saem de uma só chamada a
+    population_forces. Uma simulação termina quando o pêndulo cai
+    (|ângulo| > fall_angle) ou o carrinho chega ao limite; a partir daí ela
+    não é mais avaliada nem integrada (o estado fica congelado) e o resto do
+    horizonte conta como tempo caído, com o ângulo em fall_angle e o carrinho
+    parado na posição em que a simulação terminou.
+    
+    Args:
+        genomes (dict): População empilhada (ver genome_fields)
+        initial_states (np.ndarray): Condições iniciais (B, 2) ou (B, 4) com
+            (ângulo, velocidade angular[, posição do carrinho, velocidade do carrinho])
+        horizon (float): Duração de cada simulação (s)
+        dt (float): Passo de controle (s)
+        fall_angle (float): Ângulo a partir do qual o pêndulo é considerado caído
+        cart_limit (float): Posição do carrinho que encerra a simulação
+        weights (dict): Pesos do custo (padrão: ROLLOUT_WEIGHTS)
+        **plant: Parâmetros físicos e de integração de BatchPendulumSimulation
+            (mass, length, cart_mass, gravity, inertia, integrator, substeps)
+        
+    Returns:
+        np.ndarray: Fitness (P,) = 1 / (1 + custo médio sobre as condições iniciais)
+    """
+    weights = {**ROLLOUT_WEIGHTS, **(weights or {})}
+    states = np.atleast_2d(np.asarray(initial_states, dtype=float))
+    states = np.pad(states, ((0, 0), (0, 4 - states.shape[1])))
+    num_individuals = genomes['rule_weights'].shape[0]
+    num_states = states.shape[0]
+    
+    # Simulação e = p * B + b: indivíduo p a partir da condição inicial b
+    sim = BatchPendulumSimulation(num_individuals * num_states, dt=dt, **plant)
+    sim.reset(angle=np.tile(states[:, 0], num_individuals),
+              angular_velocity=np.tile(states[:, 1], num_individuals),
+              cart_position=np.tile(states[:, 2], num_individuals),
+              cart_velocity=np.tile(states[:, 3], num_individuals))
+    individual = np.repeat(np.arange(num_individuals), num_states)
+    
+    steps = int(round(horizon / dt))
+    alive = np.ones(sim.num_envs, dtype=bool)
+    upright_steps = np.zeros(sim.num_envs)
+    angle_itae = np.zeros(sim.num_envs)
+    cart_itae = np.zeros(sim.num_envs)
+    effort = np.zeros(sim.num_envs)
+    forces = np.zeros(sim.num_envs)
+    
+    for step in range(steps):
+        active = np.flatnonzero(alive)
+        if active.size == 0:
+            break
+        
+        # Cada simulação ativa é um "indivíduo" com um único estado
+        active_genomes = {key: value[individual[active]] for key, value in genomes.items()}
+        forces[:] = 0.0
+        forces[active] = population_forces(active_genomes, sim.angle[active, None],
+                                           sim.angular_velocity[active, None],
+                                           angle_range, angular_velocity_range, force_range)[:, 0]
+        sim.update(forces, active)
+        
+        t = (step + 1) * dt
+        angle_itae[active] += t * np.abs(sim.angle[active]) * dt
+        cart_itae[active] += t * np.abs(sim.cart_position[active]) * dt
+        effort[active] += forces[active] ** 2 * dt
+        
+        fallen = (np.abs(sim.angle[active]) > fall_angle) | (np.abs(sim.cart_position[active]) >= cart_limit)
+        upright_steps[active[~fallen]] += 1
+        alive[active[fallen]] = False
+    
+    # Resto do horizonte das simulações encerradas: integral de t de t_queda a T
+    fall_time = upright_steps * dt
+    remaining = np.where(alive, 0.0, 0.5 * (horizon ** 2 - fall_time ** 2))
+    angle_itae += fall_angle * remaining
+    cart_itae += np.minimum(np.abs(sim.cart_position), cart_limit) * remaining
+    
+    cost = (weights['upright'] * (1.0 - fall_time / horizon)
+            + weights['angle_itae'] * angle_itae
+            + weights['cart_itae'] * cart_itae
+            + weights['effort'] * effort)
+    return 1.0 / (1.0 + cost.reshape(num_individuals, num_states).mean(axis=1))
 
 class GeneticFuzzyController:
-    def __init__(self, population_size=50, mutation_rate=0.1, elite_size=5):
+    def __init__(self, population_size=50, mutation_rate=0.1, elite_size=5, backend='numpy',
+                 n_workers=1, seed=None, evaluation_mode='vectorized', fitness_mode='cases',
+                 rollout_params=None, selection='tournament', tournament_size=3, crossover='sbx',
+                 sbx_eta=15.0, blx_alpha=0.5, mutation='adaptive'):
         self.population_size = population_size
         self.mutation_rate = mutation_rate
         self.elite_size = elite_size
         
+        # Operadores: seleção 'tournament' (torneio de tournament_size
+        # indivíduos) ou 'random' (pais sorteados sem comparação); crossover
+        # 'sbx' (binário simulado, índice de distribuição sbx_eta), 'blx'
+        # (BLX-alfa) ou 'uniform' (campos inteiros de um dos pais); mutação
+        # 'adaptive' (passo ajustado pela regra de 1/5 de sucesso) ou 'fixed'
+        self.selection = selection
+        self.tournament_size = tournament_size
+        self.crossover_type = crossover
+        self.sbx_eta = sbx_eta
+        self.blx_alpha = blx_alpha
+        self.mutation_type = mutation
+        self.mutation_step = 1.0  # multiplica os desvios de MUTATION_SCALES
+        
+        # Motor de inferência: 'numpy' (nativo, vetorizado) ou 'skfuzzy' (referência)
+        self.backend = backend
+        
+        # Avaliação do fitness: 'vectorized' (população inteira em uma única
+        # computação NumPy) ou 'individual' (um indivíduo por vez, em paralelo
+        # se n_workers > 1). O gerador aleatório é próprio do controlador: o
+        # resultado depende apenas da semente, não do modo nem do número de processos
+        self.evaluation_mode = evaluation_mode
+        self.n_workers = n_workers
+        self._executor = None
+        self.rng = np.random.default_rng(seed)
+        
+        # Função de fitness: 'cases' (casos de teste estáticos) ou 'rollout'
+        # (simulação em malha fechada; os casos de teste são as condições
+        # iniciais e rollout_params vai para rollout_fitness)
+        self.fitness_mode = fitness_mode
+        self.rollout_params = dict(rollout_params or {})
+        
         # Parâmetros do sistema fuzzy
         self.angle_range = np.arange(-2*np.pi, 2*np.pi, 0.01)
         self.angular_velocity_range = np.arange(-5, 5, 0.1)
         self.force_range = np.arange(-20, 20, 0.1)
         
-        # Inicializa a população
-        self.population = self._initialize_population()
+        # População: uma matriz (P, GENOME_SIZE), um genoma por linha, e um
+        # segundo buffer do mesmo tamanho onde a próxima geração é montada
+        self.genomes = None
+        self._next_genomes = None
+        self._initialize_population()
         self.best_individual = None
         self.best_fitness = float('-inf')
+        # Fitness do melhor indivíduo calculado com outra função de fitness:
+        # reavaliado na próxima geração (ver update_parameters)
+        self._best_stale = False
         
         # Sistema fuzzy atual
         self._initialize_fuzzy_system()
         
     def _initialize_population(self):
-        """Inicializa a população de indivíduos"""
-        population = []
-        for _ in range(self.population_size):
-            individual = {
-                # Centros dos conjuntos fuzzy para ângulo
-                'angle_centers': np.random.uniform(-np.pi/2, np.pi/2, 5),
-                # Larguras dos conjuntos fuzzy para ângulo
-                'angle_widths': np.random.uniform(0.1, np.pi/4, 5),
-                # Centros dos conjuntos fuzzy para velocidade angular
-                'velocity_centers': np.random.uniform(-5, 5, 5),
-                # Larguras dos conjuntos fuzzy para velocidade angular
-                'velocity_widths': np.random.uniform(0.5, 2.5, 5),
-                # Pesos das regras
-                'rule_weights': np.random.uniform(-1, 1, 25)
-            }
-            population.append(individual)
-        return population
+        """Aloca os buffers da população e sorteia os genomas iniciais"""
+        self.genomes = np.empty((self.population_size, GENOME_SIZE))
+        self._next_genomes = np.empty_like(self.genomes)
+        self._reset_parent_fitness()
+        for name, _, (low, high), _ in GENOME_LAYOUT:
+            self.genomes[:, GENOME_SLICES[name]] = self.rng.uniform(
+                low, high, (self.population_size, GENOME_SLICES[name].stop - GENOME_SLICES[name].start))
+    
+    @property
+    def population(self):
+        """
+        Indivíduos da população como dicionários de vistas somente leitura das
+        linhas de `genomes` (alterações passam por set_population). As vistas
+        apontam para o buffer da geração atual, que é reaproveitado pelas
+        gerações seguintes: só valem até o próximo evolve, e quem quiser
+        guardar a população deve copiá-la.
+        """
+        genomes = self.genomes.view()
+        genomes.flags.writeable = False
+        return [genome_fields(genome) for genome in genomes]
+    
+    def set_population(self, genomes):
+        """Substitui a população (matriz de genomas ou lista de indivíduos), copiando para os buffers"""
+        if not isinstance(genomes, np.ndarray):
+            genomes = np.array([individual_genome(individual) for individual in genomes])
+        if genomes.shape != self.genomes.shape:
+            self.population_size = genomes.shape[0]
+            self.genomes = np.empty_like(genomes, dtype=float)
+            self._next_genomes = np.empty_like(self.genomes)
+        self.genomes[:] = genomes
+        self._reset_parent_fitness()
+    
+    def resume_evolution(self, other):
+        """
+        Assume o estado evolutivo de outra cópia do controlador (população,
+        gerador aleatório, passo da mutação adaptativa e fitness dos pais da
+        geração atual), para a próxima evolução continuar de onde ela parou
+        """
+        self.set_population(other.genomes)
+        self._parent_fitness[:] = other._parent_fitness
+        self.mutation_step = other.mutation_step
+        self.rng = other.rng
+    
+    def _reset_parent_fitness(self):
+        """Sem pais conhecidos (população nova): a próxima geração não adapta a mutação"""
+        self._parent_fitness = np.full(self.population_size, np.nan)
     
     def _initialize_fuzzy_system(self):
-        """Inicializa o sistema fuzzy com os parâmetros do melhor indivíduo"""
+        """
+        Inicializa o sistema fuzzy com os parâmetros do melhor indivíduo. Um
+        sistema já construído para o mesmo indivíduo (por exemplo, um elite que
+        volta a ser o melhor) é reaproveitado do cache de sistemas.
+        """
         if self.best_individual is None:
-            self.best_individual = self.population[0]
+            self.best_individual = genome_fields(self.genomes[0].copy())
             
         try:
-            # Conjuntos fuzzy para ângulo
-            self.angle = ctrl.Antecedent(self.angle_range, 'angle')
-            for i, (center, width) in enumerate(zip(self.best_individual['angle_centers'], 
-                                                 self.best_individual['angle_widths'])):
-                self.angle[f'set_{i}'] = fuzz.gaussmf(self.angle_range, center, width)
+            key = parameter_key('genetic', self.backend, self.best_individual, self.angle_range,
+                                self.angular_velocity_range, self.force_range)
+            system = SYSTEM_CACHE.get_or_build(key, self._build_fuzzy_system)
+            for name, value in system.items():
+                setattr(self, name, value)
             
-            # Conjuntos fuzzy para velocidade angular
-            self.angular_velocity = ctrl.Antecedent(self.angular_velocity_range, 'angular_velocity')
-            for i, (center, width) in enumerate(zip(self.best_individual['velocity_centers'],
-                                                 self.best_individual['velocity_widths'])):
-                self.angular_velocity[f'set_{i}'] = fuzz.gaussmf(self.angular_velocity_range, center, width)
-            
-            # Conjuntos fuzzy para força
-            self.force = ctrl.Consequent(self.force_range, 'force')
-            self.force['negative'] = fuzz.trimf(self.force_range, [-20, -10, 0])
-            self.force['zero'] = fuzz.trimf(self.force_range, [-10, 0, 10])
-            self.force['positive'] = fuzz.trimf(self.force_range, [0, 10, 20])
-            
-            # Regras fuzzy
-            rules = []
-            rule_idx = 0
-            for i in range(5):  # Para cada conjunto de ângulo
-                for j in range(5):  # Para cada conjunto de velocidade
-                    weight = self.best_individual['rule_weights'][rule_idx]
-                    if weight > 0:
-                        rules.append(ctrl.Rule(
-                            self.angle[f'set_{i}'] & self.angular_velocity[f'set_{j}'],
-                            self.force['positive']
-                        ))
-                    else:
-                        rules.append(ctrl.Rule(
-                            self.angle[f'set_{i}'] & self.angular_velocity[f'set_{j}'],
-                            self.force['negative']
-                        ))
-                    rule_idx += 1
-            
-            # Sistema de controle
-            self.control_system = ctrl.ControlSystem(rules)
-            self.simulation = ctrl.ControlSystemSimulation(self.control_system)
+            if self.backend == 'skfuzzy':
+                # A simulação guarda entradas e saídas: uma por controlador
+                from skfuzzy import control as ctrl
+                self.simulation = ctrl.ControlSystemSimulation(self.control_system)
             
         except Exception as e:
             print(f"Erro ao inicializar sistema fuzzy: {str(e)}")
@@ -104,6 +404,54 @@ class GeneticFuzzyController:
                 print(f"Erro fatal ao inicializar sistema fuzzy: {str(e)}")
                 raise
     
+    def _build_fuzzy_system(self):
+        """
+        Constrói o sistema fuzzy do melhor indivíduo.
+        
+        Returns:
+            dict: Atributos do sistema ('engine' e, no backend skfuzzy, as
+                variáveis e o ControlSystem)
+        """
+        # Motor nativo
+        system = {'engine': build_engine(self.best_individual, self.angle_range,
+                                         self.angular_velocity_range, self.force_range)}
+        
+        if self.backend == 'skfuzzy':
+            # skfuzzy.control importa o matplotlib: carregado só quando usado
+            import skfuzzy as fuzz
+            from skfuzzy import control as ctrl
+            
+            # Conjuntos fuzzy para ângulo
+            angle = ctrl.Antecedent(self.angle_range, 'angle')
+            for i, (center, width) in enumerate(zip(self.best_individual['angle_centers'], 
+                                                 self.best_individual['angle_widths'])):
+                angle[f'set_{i}'] = fuzz.gaussmf(self.angle_range, center, width)
+            
+            # Conjuntos fuzzy para velocidade angular
+            angular_velocity = ctrl.Antecedent(self.angular_velocity_range, 'angular_velocity')
+            for i, (center, width) in enumerate(zip(self.best_individual['velocity_centers'],
+                                                 self.best_individual['velocity_widths'])):
+                angular_velocity[f'set_{i}'] = fuzz.gaussmf(self.angular_velocity_range, center, width)
+            
+            # Conjuntos fuzzy para força
+            force = ctrl.Consequent(self.force_range, 'force')
+            for label, abc in FORCE_SETS:
+                force[label] = fuzz.trimf(self.force_range, abc)
+            
+            # Regras fuzzy
+            skfuzzy_rules = []
+            for i, j, k in individual_rules(self.best_individual):
+                skfuzzy_rules.append(ctrl.Rule(
+                    angle[f'set_{i}'] & angular_velocity[f'set_{j}'],
+                    force[FORCE_SETS[k][0]]
+                ))
+            
+            # Sistema de controle
+            system.update(angle=angle, angular_velocity=angular_velocity, force=force,
+                          control_system=ctrl.ControlSystem(skfuzzy_rules))
+        
+        return system
+    
     def compute_control(self, angle, angular_velocity):
         """
         Computa a força de controle usando o sistema fuzzy otimizado
@@ -112,6 +460,14 @@ class GeneticFuzzyController:
             # Limita apenas a velocidade angular
             angular_velocity = np.clip(angular_velocity, -10, 10)
             
+            if self.backend == 'numpy':
+                force = float(self.engine.compute(angle, angular_velocity))
+                if np.isnan(force):
+                    # Nenhuma regra disparou: o skfuzzy não gera a saída 'force'
+                    print("Erro no controlador Genetic-Fuzzy: saída 'force' não encontrada")
+                    return 0.0
+                return np.clip(force, -20, 20)
+            
             self.simulation.input['angle'] = angle
             self.simulation.input['angular_velocity'] = angular_velocity
             self.simulation.compute()
@@ -123,95 +479,285 @@ class GeneticFuzzyController:
             print(f"Erro no controlador Genetic-Fuzzy: {str(e)}")
             return 0.0
     
+    def compute_control_batch(self, angles, angular_velocities):
+        """
+        Computa a força de controle para N estados de uma só vez usando o
+        motor nativo (vetorizado), independentemente do backend escalar.
+        
+        Args:
+            angles (np.ndarray): Ângulos dos N estados
+            angular_velocities (np.ndarray): Velocidades angulares dos N estados
+            
+        Returns:
+            np.ndarray: Forças de controle (N,)
+        """
+        angular_velocities = np.clip(np.asarray(angular_velocities, dtype=float), -10, 10)
+        force = self.engine.compute(np.asarray(angles, dtype=float), angular_velocities)
+        
+        # Estados em que nenhuma regra dispara recebem força zero
+        return np.clip(np.nan_to_num(force, nan=0.0), -20, 20)
+    
     def evaluate_fitness(self, individual, test_cases):
         """
-        Avalia o fitness de um indivíduo usando casos de teste
+        Avalia o fitness de um indivíduo usando casos de teste.
+        
+        Não altera o controlador: o sistema do indivíduo é montado à parte no
+        motor nativo (mesmas saídas do skfuzzy).
         """
-        try:
-            # Configura o sistema fuzzy com os parâmetros do indivíduo
-            self.best_individual = individual
-            self._initialize_fuzzy_system()
-            
-            total_error = 0
-            for angle, velocity, target_force in test_cases:
-                # Simula o sistema para cada caso
-                force = self.compute_control(angle, velocity)
-                # Penaliza o desvio do pêndulo e do carrinho
-                # Aqui, supomos que o objetivo é manter o pêndulo em pé (angle ~ 0) e o carrinho no centro (posição ~ 0)
-                # Como não temos a posição do carrinho no teste, penalizamos apenas o ângulo e a força aplicada
-                error = abs(angle) + 0.1 * abs(force)  # Peso maior para o ângulo
-                total_error += error
-            # Fitness é o inverso do erro total
+        return evaluate_individual_fitness(individual, test_cases, self.angle_range,
+                                           self.angular_velocity_range, self.force_range)
+    
+    def evaluate_population(self, test_cases):
+        """
+        Avalia o fitness de toda a população. Indivíduos já avaliados com os
+        mesmos casos de teste e parâmetros (os elites, por exemplo) vêm do
+        cache de fitness; só os demais são avaliados, com
+        _evaluate_individuals.
+        
+        Returns:
+            np.ndarray: Fitness de cada indivíduo, na ordem da população
+        """
+        context = parameter_key(self.fitness_mode, self.evaluation_mode, np.asarray(test_cases, dtype=float),
+                                self.angle_range, self.angular_velocity_range, self.force_range,
+                                self.rollout_params if self.fitness_mode == 'rollout' else None)
+        keys = [parameter_key(context, genome) for genome in self.genomes]
+        fitness_scores = np.empty(len(keys))
+        missing = []
+        for i, key in enumerate(keys):
+            fitness = FITNESS_CACHE.get(key)
+            if fitness is None:
+                missing.append(i)
+            else:
+                fitness_scores[i] = fitness
+        
+        if missing:
+            fitness_scores[missing] = self._evaluate_individuals(self.genomes[missing], test_cases)
+            for i in missing:
+                FITNESS_CACHE.put(keys[i], float(fitness_scores[i]))
+        return fitness_scores
+    
+    def _evaluate_individuals(self, genomes, test_cases):
+        """
+        Avalia o fitness dos genomas (P, GENOME_SIZE), vetorizado ou indivíduo
+        a indivíduo (em paralelo se n_workers > 1), conforme evaluation_mode.
+        No modo de fitness 'rollout', os casos de teste são condições
+        iniciais e todos os indivíduos são simulados em lote.
+        
+        Returns:
+            np.ndarray: Fitness de cada genoma, na ordem das linhas
+        """
+        if self.fitness_mode == 'rollout':
+            return rollout_fitness(genome_fields(genomes), test_cases, self.angle_range,
+                                   self.angular_velocity_range, self.force_range, **self.rollout_params)
+        
+        if self.evaluation_mode == 'vectorized':
+            cases = np.asarray(test_cases, dtype=float).reshape(-1, 3)
+            force = population_forces(genome_fields(genomes), cases[:, 0], cases[:, 1],
+                                      self.angle_range, self.angular_velocity_range, self.force_range)
+            total_error = np.sum(np.abs(cases[:, 0]) + 0.1 * np.abs(force), axis=1)
             return 1.0 / (1.0 + total_error)
+        
+        evaluate = partial(evaluate_individual_fitness, test_cases=np.asarray(test_cases, dtype=float),
+                           angle_range=self.angle_range,
+                           angular_velocity_range=self.angular_velocity_range,
+                           force_range=self.force_range)
+        
+        population = [genome_fields(genome) for genome in genomes]
+        if self.n_workers <= 1:
+            return np.array([evaluate(ind) for ind in population])
+        
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.n_workers)
+        chunksize = max(1, len(population) // (4 * self.n_workers))
+        return np.array(list(self._executor.map(evaluate, population, chunksize=chunksize)))
+    
+    def shutdown(self):
+        """Encerra o pool de processos de avaliação, se existir"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def __getstate__(self):
+        """
+        Estado para pickle e copy.deepcopy, sem o pool de processos (que não
+        pode ser copiado); a cópia cria o próprio pool na primeira avaliação
+        paralela
+        """
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        return state
+    
+    def select(self, fitness_scores, count):
+        """
+        Sorteia `count` pais. No torneio, cada pai é o melhor de
+        tournament_size indivíduos sorteados (com reposição).
+        
+        Returns:
+            np.ndarray: Índices dos pais (count,)
+        """
+        if self.selection == 'random':
+            return self.rng.integers(self.population_size, size=count)
+        candidates = self.rng.integers(self.population_size, size=(count, self.tournament_size))
+        winners = np.argmax(fitness_scores[candidates], axis=1)
+        return candidates[np.arange(count), winners]
+    
+    def crossover(self, first_parents, second_parents, out):
+        """
+        Gera um filho por par de pais, conforme crossover_type:
+        
+        - 'sbx': crossover binário simulado, parâmetro a parâmetro; filhos
+          perto dos pais, com espalhamento controlado por sbx_eta
+        - 'blx': BLX-alfa, cada parâmetro sorteado no intervalo entre os pais
+          estendido em blx_alpha vezes a distância entre eles
+        - 'uniform': cada campo vem inteiro de um dos dois pais
+        
+        Args:
+            first_parents (np.ndarray): Índices dos primeiros pais (C,)
+            second_parents (np.ndarray): Índices dos segundos pais (C,)
+            out (np.ndarray): Linhas (C, GENOME_SIZE) onde os filhos são gravados
+        """
+        np.take(self.genomes, first_parents, axis=0, out=out)
+        second = self.genomes[second_parents]
+        
+        if self.crossover_type == 'uniform':
+            from_second = self.rng.random((len(out), len(GENOME_LAYOUT))) < 0.5
+            np.copyto(out, second, where=from_second[:, GENOME_FIELD_INDEX])
             
-        except Exception as e:
-            print(f"Erro na avaliação do fitness: {str(e)}")
-            return 0.0
+        elif self.crossover_type == 'blx':
+            low = np.minimum(out, second)
+            spread = np.abs(second - out)
+            low -= self.blx_alpha * spread
+            spread *= 1 + 2 * self.blx_alpha
+            out[:] = low + self.rng.random(out.shape) * spread
+            
+        else:
+            # Fator de espalhamento beta de cada parâmetro; o sinal escolhe
+            # um dos dois filhos simétricos em torno da média dos pais
+            u = self.rng.random(out.shape)
+            beta = np.where(u <= 0.5, 2 * u, 1 / (2 * (1 - u))) ** (1 / (self.sbx_eta + 1))
+            beta *= np.where(self.rng.random(out.shape) < 0.5, -0.5, 0.5)
+            out += second
+            out *= 0.5
+            out += beta * (second - self.genomes[first_parents])
     
-    def crossover(self, parent1, parent2):
-        """Realiza o crossover entre dois indivíduos"""
-        child = {}
-        for key in parent1.keys():
-            if random.random() < 0.5:
-                child[key] = parent1[key].copy()
-            else:
-                child[key] = parent2[key].copy()
-        return child
-    
-    def mutate(self, individual):
-        """Aplica mutação em um indivíduo"""
-        mutated = individual.copy()
-        for key in individual.keys():
-            if random.random() < self.mutation_rate:
-                if 'centers' in key:
-                    mutated[key] += np.random.normal(0, 0.1, size=individual[key].shape)
-                elif 'widths' in key:
-                    mutated[key] += np.random.normal(0, 0.05, size=individual[key].shape)
-                else:  # rule_weights
-                    mutated[key] += np.random.normal(0, 0.2, size=individual[key].shape)
-        return mutated
+    def mutate(self, genomes):
+        """
+        Mutação no lugar: cada campo de cada genoma, com probabilidade
+        mutation_rate, recebe ruído gaussiano com o desvio do campo vezes o
+        passo atual (mutation_step)
+        """
+        mutated = self.rng.random((len(genomes), len(GENOME_LAYOUT))) < self.mutation_rate
+        noise = self.rng.normal(0.0, 1.0, genomes.shape)
+        noise *= MUTATION_SCALES * self.mutation_step
+        noise *= mutated[:, GENOME_FIELD_INDEX]
+        genomes += noise
+    
+    def adapt_mutation(self, fitness_scores):
+        """
+        Regra de 1/5 de sucesso: compara o fitness de cada filho da geração
+        avaliada com o do melhor dos seus pais e ajusta o passo da mutação
+        """
+        known = ~np.isnan(self._parent_fitness)
+        if self.mutation_type != 'adaptive' or not known.any():
+            return
+        success_rate = np.mean(fitness_scores[known] > self._parent_fitness[known])
+        if success_rate > SUCCESS_TARGET:
+            self.mutation_step /= STEP_ADAPTATION
+        elif success_rate < SUCCESS_TARGET:
+            self.mutation_step *= STEP_ADAPTATION
+        self.mutation_step = min(max(self.mutation_step, STEP_LIMITS[0]), STEP_LIMITS[1])
+    
+    def set_best_individual(self, individual, fitness):
+        """Troca o indivíduo usado no controle (por exemplo, vindo de uma evolução em segundo plano)"""
+        self.best_individual = individual
+        self.best_fitness = fitness
+        self._best_stale = False
+        self._initialize_fuzzy_system()
     
     def evolve(self, test_cases):
         """
         Realiza uma geração de evolução
+        
+        Returns:
+            np.ndarray: Fitness de cada indivíduo da geração avaliada
         """
         # Avalia todos os indivíduos
-        fitness_scores = [self.evaluate_fitness(ind, test_cases) for ind in self.population]
+        fitness_scores = self.evaluate_population(test_cases)
+        self.adapt_mutation(fitness_scores)
+        
+        # Melhor indivíduo de outra função de fitness: reavaliado nesta, para
+        # só ser trocado por um indivíduo de fato melhor na escala atual
+        if self._best_stale:
+            self.best_fitness = float(self._evaluate_individuals(
+                individual_genome(self.best_individual)[None], test_cases)[0])
+            self._best_stale = False
         
-        # Encontra o melhor indivíduo
+        # Encontra o melhor indivíduo (copiado: os buffers são reaproveitados)
         best_idx = np.argmax(fitness_scores)
         if fitness_scores[best_idx] > self.best_fitness:
             self.best_fitness = fitness_scores[best_idx]
-            self.best_individual = self.population[best_idx].copy()
+            self.best_individual = genome_fields(self.genomes[best_idx].copy())
             self._initialize_fuzzy_system()
         
-        # Seleciona os melhores indivíduos (elite)
-        elite_indices = np.argsort(fitness_scores)[-self.elite_size:]
-        new_population = [self.population[i].copy() for i in elite_indices]
+        # A nova geração é montada no segundo buffer: elite primeiro...
+        new_genomes = self._next_genomes
+        elite_size = min(self.elite_size, self.population_size)
+        elite_indices = np.argsort(fitness_scores)[self.population_size - elite_size:]
+        np.take(self.genomes, elite_indices, axis=0, out=new_genomes[:elite_size])
+        
+        # ...depois os filhos de pares de pais selecionados, com crossover e
+        # mutação, limitados a GENOME_LIMITS
+        children = new_genomes[elite_size:]
+        first_parents = self.select(fitness_scores, len(children))
+        second_parents = self.select(fitness_scores, len(children))
+        self.crossover(first_parents, second_parents, children)
+        self.mutate(children)
+        np.clip(children, GENOME_LOWER, GENOME_UPPER, out=children)
+        
+        # Fitness dos pais de cada linha, para adaptar a mutação na próxima geração
+        self._parent_fitness[:elite_size] = np.nan
+        self._parent_fitness[elite_size:] = np.maximum(fitness_scores[first_parents],
+                                                       fitness_scores[second_parents])
+        
+        # Troca os buffers
+        self.genomes, self._next_genomes = new_genomes, self.genomes
+        return fitness_scores
+    
+    def update_parameters(self, population_size=None, mutation_rate=None, elite_size=None, n_workers=None,
+                          fitness_mode=None, rollout_params=None, selection=None, tournament_size=None,
+                          crossover=None, mutation=None):
+        """
+        Atualiza os parâmetros do controlador.
+        
+        A população só é recriada quando o tamanho muda de fato. O sistema
+        fuzzy usado no controle depende apenas do melhor indivíduo, que estes
+        parâmetros não alteram, então não é reconstruído. Quando a função de
+        fitness muda (modo ou parâmetros das simulações), o fitness do melhor
+        indivíduo deixa de ser comparável: ele volta a -inf e o indivíduo é
+        reavaliado na próxima geração.
+        """
+        def fitness_key():
+            return parameter_key(self.fitness_mode,
+                                 self.rollout_params if self.fitness_mode == 'rollout' else None)
+        previous_fitness = fitness_key()
         
-        # Completa a nova população com crossover e mutação
-        while len(new_population) < self.population_size:
-            # Seleção por torneio
-            idx1 = random.randint(0, len(self.population)-1)
-            idx2 = random.randint(0, len(self.population)-1)
-            parent1 = self.population[idx1]
-            parent2 = self.population[idx2]
+        if fitness_mode is not None:
+            self.fitness_mode = fitness_mode
             
-            # Crossover
-            child = self.crossover(parent1, parent2)
+        if rollout_params is not None:
+            self.rollout_params.update(rollout_params)
             
-            # Mutação
-            child = self.mutate(child)
+        if fitness_key() != previous_fitness:
+            self.best_fitness = float('-inf')
+            self._best_stale = True
             
-            new_population.append(child)
-        
-        self.population = new_population 
-    
-    def update_parameters(self, population_size=None, mutation_rate=None, elite_size=None):
-        """Atualiza os parâmetros do controlador"""
-        if population_size is not None:
+        if n_workers is not None and n_workers != self.n_workers:
+            self.shutdown()
+            self.n_workers = n_workers
+            
+        if population_size is not None and population_size != self.population_size:
             self.population_size = population_size
-            self.population = self._initialize_population()
+            self._initialize_population()
             
         if mutation_rate is not None:
             self.mutation_rate = mutation_rate
@@ -219,5 +765,15 @@ class GeneticFuzzyController:
         if elite_size is not None:
             self.elite_size = elite_size
             
-        # Reinicializa o sistema fuzzy com os parâmetros atuais
-        self._initialize_fuzzy_system() 
\ No newline at end of file
+        if selection is not None:
+            self.selection = selection
+            
+        if tournament_size is not None:
+            self.tournament_size = tournament_size
+            
+        if crossover is not None:
+            self.crossover_type = crossover
+            
+        if mutation is not None and mutation != self.mutation_type:
+            self.mutation_type = mutation
+            self.mutation_step = 1.0 
\ No newline at end of file
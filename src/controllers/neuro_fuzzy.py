@@ -2,6 +2,8 @@ import torch
 import torch.nn as nn
 import numpy as np
 
+from src.controllers.neuro_fuzzy_numpy import PARAMETER_NAMES
+
 class NeuroFuzzySystem(nn.Module):
     def __init__(self, num_inputs=2, num_membership=3, num_rules=9):
         super().__init__()
@@ -23,14 +25,15 @@ class NeuroFuzzySystem(nn.Module):
         return torch.exp(-0.5 * ((x.unsqueeze(-1) - centers) / widths) ** 2)
     
     def forward(self, x):
+        # x: (num_inputs,) para um estado ou (N, num_inputs) para um lote
         # Fuzzificação
         membership_values = self.gaussian_membership(x, self.membership_centers, self.membership_widths)
         
-        # Achatamento dos valores de pertinência
-        flattened_membership = membership_values.reshape(-1)
+        # Achatamento dos valores de pertinência (mantém a dimensão do lote)
+        flattened_membership = membership_values.reshape(*x.shape[:-1], -1)
         
         # Computação das regras
-        rule_outputs = torch.matmul(self.rule_weights, flattened_membership)
+        rule_outputs = torch.matmul(flattened_membership, self.rule_weights.t())
         rule_outputs = torch.sigmoid(rule_outputs)
         
         # Defuzzificação
@@ -38,14 +41,64 @@ class NeuroFuzzySystem(nn.Module):
         
         return output
 
+class ReplayBuffer:
+    """
+    Buffer circular de tamanho fixo com amostras (ângulo, velocidade angular,
+    força alvo) para o treinamento em mini-lotes. Quando cheio, as amostras
+    mais antigas são sobrescritas.
+    """
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, 2))
+        self.targets = np.zeros(capacity)
+        self.size = 0
+        self._next = 0
+        
+    def __len__(self):
+        return self.size
+    
+    def add(self, angle, angular_velocity, target_force):
+        """Adiciona uma amostra"""
+        self.add_batch([angle], [angular_velocity], [target_force])
+        
+    def add_batch(self, angles, angular_velocities, target_forces):
+        """Adiciona N amostras de uma vez"""
+        states = np.column_stack([np.ravel(angles), np.ravel(angular_velocities)])
+        targets = np.ravel(target_forces)
+        
+        # Se vierem mais amostras do que cabem, só as últimas são mantidas
+        states = states[-self.capacity:]
+        targets = targets[-self.capacity:]
+        index = (self._next + np.arange(len(targets))) % self.capacity
+        self.states[index] = states
+        self.targets[index] = targets
+        self._next = (self._next + len(targets)) % self.capacity
+        self.size = min(self.size + len(targets), self.capacity)
+        
+    def sample(self, batch_size, rng):
+        """Sorteia um mini-lote (com reposição): (estados (B, 2), alvos (B,))"""
+        if self.size == 0:
+            raise ValueError("ReplayBuffer vazio: adicione amostras antes de sortear um mini-lote")
+        index = rng.integers(self.size, size=batch_size)
+        return self.states[index], self.targets[index]
+    
+    def clear(self):
+        self.size = 0
+        self._next = 0
+
 class NeuroFuzzyController:
-    def __init__(self, learning_rate=0.01, num_rules=9):
+    def __init__(self, learning_rate=0.01, num_rules=9, batch_size=64, replay_capacity=100000, seed=None):
         self.learning_rate = learning_rate
         self.num_rules = num_rules
         self.model = NeuroFuzzySystem(num_rules=num_rules)
         self.optimizer = torch.optim.Adam(self.model.parameters(), lr=learning_rate)
         self.criterion = nn.MSELoss()
         
+        # Treinamento em mini-lotes a partir de um buffer de experiência
+        self.batch_size = batch_size
+        self.replay_buffer = ReplayBuffer(replay_capacity)
+        self.rng = np.random.default_rng(seed)
+        
         # Inicializa os parâmetros com valores mais estáveis
         with torch.no_grad():
             # Centros dos conjuntos fuzzy
@@ -84,6 +137,29 @@ class NeuroFuzzyController:
             print(f"Erro no controlador Neuro-Fuzzy: {str(e)}")
             return 0.0
     
+    def compute_control_batch(self, angles, angular_velocities):
+        """
+        Computa a força de controle para N estados com uma única passagem do modelo.
+        
+        Args:
+            angles (np.ndarray): Ângulos dos N estados
+            angular_velocities (np.ndarray): Velocidades angulares dos N estados
+            
+        Returns:
+            np.ndarray: Forças de controle (N,)
+        """
+        angles = np.asarray(angles, dtype=float)
+        with torch.no_grad():
+            force = self.model(self._model_inputs(angles, angular_velocities)).numpy().astype(float)
+        
+        return np.clip(force.reshape(angles.shape), -20, 20)
+    
+    def _model_inputs(self, angles, angular_velocities):
+        """Tensor (N, 2) com as entradas limitadas como em compute_control"""
+        angles = np.clip(np.ravel(angles), -np.pi/2, np.pi/2)
+        angular_velocities = np.clip(np.ravel(angular_velocities), -10, 10)
+        return torch.tensor(np.stack([angles, angular_velocities], axis=1), dtype=torch.float32)
+    
     def train_step(self, angle, angular_velocity, target_force):
         """
         Realiza um passo de treinamento do sistema neuro-fuzzy.
@@ -112,4 +188,96 @@ class NeuroFuzzyController:
             
         except Exception as e:
             print(f"Erro no treinamento Neuro-Fuzzy: {str(e)}")
-            return float('inf') 
\ No newline at end of file
+            return float('inf')
+    
+    def add_experience(self, angles, angular_velocities, target_forces):
+        """Adiciona amostras (escalares ou arrays) ao buffer de experiência"""
+        self.replay_buffer.add_batch(angles, angular_velocities, target_forces)
+        
+    def collect_rollouts(self, expert, simulation, steps=500, initial_angle=0.3, initial_velocity=1.0,
+                         behavior=None):
+        """
+        Simula os pêndulos de um BatchPendulumSimulation e guarda no buffer o
+        estado visitado e a força do especialista a cada passo.
+        
+        Args:
+            expert: Controlador com compute_control_batch que fornece os alvos
+            simulation (BatchPendulumSimulation): Pêndulos simulados em paralelo
+            steps (int): Passos por pêndulo
+            initial_angle (float): Ângulos iniciais sorteados em ±initial_angle
+            initial_velocity (float): Velocidades angulares iniciais em ±initial_velocity
+            behavior: Controlador que age na simulação (padrão: o próprio
+                especialista); usar este controlador visita os estados em que
+                ele erra
+                
+        Returns:
+            int: Número de amostras adicionadas
+        """
+        behavior = expert if behavior is None else behavior
+        simulation.reset(angle=self.rng.uniform(-initial_angle, initial_angle, simulation.num_envs),
+                         angular_velocity=self.rng.uniform(-initial_velocity, initial_velocity,
+                                                           simulation.num_envs))
+        for _ in range(steps):
+            angles = simulation.angle.copy()
+            angular_velocities = simulation.angular_velocity.copy()
+            targets = expert.compute_control_batch(angles, angular_velocities)
+            self.add_experience(angles, angular_velocities, targets)
+            forces = targets if behavior is expert else behavior.compute_control_batch(angles, angular_velocities)
+            simulation.update(forces)
+        return steps * simulation.num_envs
+    
+    def train_minibatch(self, batch_size=None):
+        """
+        Um passo do otimizador em um mini-lote sorteado do buffer.
+        
+        Returns:
+            float: Valor da função de perda no mini-lote, ou None se o buffer
+                ainda estiver vazio (nada a treinar)
+        """
+        if len(self.replay_buffer) == 0:
+            return None
+        states, targets = self.replay_buffer.sample(batch_size or self.batch_size, self.rng)
+        return self._optimize(states, targets)
+    
+    def train(self, epochs=1, batch_size=None):
+        """
+        Treina sobre todo o buffer: em cada época as amostras são embaralhadas
+        e percorridas em mini-lotes.
+        
+        Returns:
+            list: Perda média de cada época
+        """
+        batch_size = batch_size or self.batch_size
+        size = len(self.replay_buffer)
+        states = self.replay_buffer.states[:size]
+        targets = self.replay_buffer.targets[:size]
+        
+        history = []
+        for _ in range(epochs):
+            order = self.rng.permutation(size)
+            total_loss = 0.0
+            for start in range(0, size, batch_size):
+                index = order[start:start + batch_size]
+                total_loss += self._optimize(states[index], targets[index]) * len(index)
+            history.append(total_loss / max(size, 1))
+        return history
+    
+    def _optimize(self, states, targets):
+        """Passo do otimizador em um lote (B, 2) -> (B,)"""
+        for group in self.optimizer.param_groups:
+            group['lr'] = self.learning_rate
+        
+        self.optimizer.zero_grad()
+        output = self.model(self._model_inputs(states[:, 0], states[:, 1]))
+        loss = self.criterion(output, torch.tensor(targets, dtype=torch.float32))
+        loss.backward()
+        self.optimizer.step()
+        return loss.item()
+    
+    def export_parameters(self, path):
+        """
+        Grava os parâmetros do modelo em um arquivo .npz, para inferência sem
+        PyTorch com NeuroFuzzyInference (neuro_fuzzy_numpy.py).
+        """
+        np.savez(path, **{name: getattr(self.model, name).detach().numpy()
+                          for name in PARAMETER_NAMES})
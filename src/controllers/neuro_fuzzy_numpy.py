@@ -0,0 +1,81 @@
+"""
+Inferência do NeuroFuzzySystem em NumPy puro, sem PyTorch.
+
+Os parâmetros de um modelo treinado são exportados com
+NeuroFuzzyController.export_parameters (arquivo .npz) e carregados aqui. As
+contas são feitas em float32, como no modelo original, e reproduzem as suas
+saídas a menos do arredondamento em float32 (diferenças da ordem de 1e-6).
+"""
+import numpy as np
+
+# Parâmetros gravados pelo export (nomes dos parâmetros do NeuroFuzzySystem)
+PARAMETER_NAMES = ('membership_centers', 'membership_widths', 'rule_weights', 'consequent_weights')
+
+
+class NeuroFuzzyInference:
+    def __init__(self, membership_centers, membership_widths, rule_weights, consequent_weights):
+        """
+        Args:
+            membership_centers (np.ndarray): Centros das gaussianas (n_entradas, n_conjuntos)
+            membership_widths (np.ndarray): Larguras das gaussianas (n_entradas, n_conjuntos)
+            rule_weights (np.ndarray): Pesos das regras (n_regras, n_entradas * n_conjuntos)
+            consequent_weights (np.ndarray): Pesos dos consequentes (n_regras,)
+        """
+        self.membership_centers = np.asarray(membership_centers, dtype=np.float32)
+        self.membership_widths = np.asarray(membership_widths, dtype=np.float32)
+        self.rule_weights = np.asarray(rule_weights, dtype=np.float32)
+        self.consequent_weights = np.asarray(consequent_weights, dtype=np.float32)
+        self.num_rules = self.rule_weights.shape[0]
+
+        # Transposta contígua para o produto das regras
+        self._rule_weights_t = np.ascontiguousarray(self.rule_weights.T)
+
+    @classmethod
+    def load(cls, path):
+        """Carrega os parâmetros exportados por NeuroFuzzyController.export_parameters"""
+        with np.load(path) as data:
+            return cls(*(data[name] for name in PARAMETER_NAMES))
+
+    def forward(self, x):
+        """
+        Mesma computação de NeuroFuzzySystem.forward.
+
+        Args:
+            x (np.ndarray): Entradas (n_entradas,) ou (N, n_entradas)
+
+        Returns:
+            np.ndarray: Saída escalar (formato ()) ou (N,), em float32
+        """
+        x = np.asarray(x, dtype=np.float32)
+        membership_values = np.exp(np.float32(-0.5) * ((x[..., None] - self.membership_centers)
+                                                       / self.membership_widths) ** 2)
+        flattened_membership = membership_values.reshape(*x.shape[:-1], -1)
+        rule_outputs = flattened_membership @ self._rule_weights_t
+        rule_outputs = 1 / (1 + np.exp(-rule_outputs))
+        return rule_outputs @ self.consequent_weights
+
+    def compute_control(self, angle, angular_velocity):
+        """
+        Computa a força de controle (mesmos limites do NeuroFuzzyController)
+        """
+        try:
+            angle = min(max(float(angle), -np.pi/2), np.pi/2)
+            angular_velocity = min(max(float(angular_velocity), -10.0), 10.0)
+            force = float(self.forward((angle, angular_velocity)))
+            return min(max(force, -20.0), 20.0)
+
+        except Exception as e:
+            print(f"Erro no controlador Neuro-Fuzzy: {str(e)}")
+            return 0.0
+
+    def compute_control_batch(self, angles, angular_velocities):
+        """
+        Computa a força de controle para N estados de uma só vez.
+
+        Returns:
+            np.ndarray: Forças de controle (N,)
+        """
+        angles = np.clip(np.asarray(angles, dtype=float), -np.pi/2, np.pi/2)
+        angular_velocities = np.clip(np.asarray(angular_velocities, dtype=float), -10, 10)
+        force = self.forward(np.stack([angles.ravel(), angular_velocities.ravel()], axis=1)).astype(float)
+        return np.clip(force.reshape(angles.shape), -20, 20)
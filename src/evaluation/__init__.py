@@ -0,0 +1,4 @@
+"""
+Avaliação dos controladores fora da interface gráfica: robustez de Monte
+Carlo sobre distribuições de parâmetros do pêndulo e de estados iniciais.
+"""
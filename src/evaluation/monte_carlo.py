@@ -0,0 +1,274 @@
+"""
+Avaliação de robustez por Monte Carlo.
+
+Sorteia milhares de cenários (parâmetros físicos do pêndulo + estado inicial),
+simula um episódio em malha fechada para cada um e resume a taxa de sucesso,
+o tempo de acomodação e o esforço de controle. Os cenários são simulados em
+lotes em um BatchPendulumSimulation (um pêndulo com parâmetros próprios por
+cenário, forças de todos os pêndulos ativos em uma só chamada a
+compute_control_batch) e os lotes podem ser distribuídos entre processos.
+
+Uso:
+    python -m src.evaluation.monte_carlo --samples 5000 --workers 4 --output robustez.json
+    python -m src.evaluation.monte_carlo --controller FIS Genetic-Fuzzy --config distribuicoes.json
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from src.simulation.batch_pendulum_sim import BatchPendulumSimulation
+
+# Distribuições padrão: um valor fixo ou (tipo, a, b), com tipo 'uniform'
+# (limites a e b) ou 'normal' (média a, desvio b). A inércia None é m_p * l^2.
+PLANT_DISTRIBUTIONS = {
+    'mass': ('uniform', 0.5, 2.0),
+    'length': ('uniform', 0.5, 1.5),
+    'cart_mass': ('uniform', 0.5, 2.0),
+    'gravity': 9.81,
+    'inertia': None,
+}
+INITIAL_STATE_DISTRIBUTIONS = {
+    'angle': ('uniform', -0.3, 0.3),
+    'angular_velocity': ('uniform', -1.0, 1.0),
+    'cart_position': 0.0,
+    'cart_velocity': 0.0,
+}
+
+# Parâmetros padrão dos episódios
+EPISODE_PARAMS = {
+    'horizon': 10.0,             # Duração de cada episódio (s)
+    'dt': 0.01,
+    'integrator': 'euler',
+    'substeps': 1,
+    'fall_angle': np.pi / 4,     # |ângulo| acima do qual o pêndulo é considerado caído
+    'cart_limit': 10.0,          # Posição do carrinho que encerra o episódio
+    'settle_tolerance': 0.05,    # Faixa de |ângulo| (rad) considerada acomodada
+}
+
+# Métricas por cenário retornadas por simulate_scenarios
+SCENARIO_METRICS = ('success', 'fall_time', 'settling_time', 'effort', 'max_abs_angle', 'final_abs_angle')
+
+
+def sample_distribution(spec, count, rng):
+    """Amostra `count` valores de uma distribuição (ver PLANT_DISTRIBUTIONS)"""
+    if not isinstance(spec, (tuple, list)):
+        return np.full(count, float(spec))
+    kind, a, b = spec
+    if kind == 'uniform':
+        return rng.uniform(a, b, count)
+    if kind == 'normal':
+        return rng.normal(a, b, count)
+    raise ValueError(f"Distribuição desconhecida: {kind}")
+
+
+def sample_scenarios(count, plant=None, initial_state=None, rng=None):
+    """
+    Sorteia `count` cenários.
+
+    Args:
+        plant (dict): Distribuições dos parâmetros físicos (sobre PLANT_DISTRIBUTIONS)
+        initial_state (dict): Distribuições do estado inicial (sobre INITIAL_STATE_DISTRIBUTIONS)
+
+    Returns:
+        dict: Um array (count,) por parâmetro e variável de estado
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    distributions = {**PLANT_DISTRIBUTIONS, **(plant or {}), **INITIAL_STATE_DISTRIBUTIONS, **(initial_state or {})}
+    scenarios = {}
+    for name, spec in distributions.items():
+        if spec is None:
+            continue
+        scenarios[name] = sample_distribution(spec, count, rng)
+    if 'inertia' not in scenarios:
+        scenarios['inertia'] = scenarios['mass'] * scenarios['length'] ** 2
+    return scenarios
+
+
+def simulate_scenarios(controller, scenarios, horizon=10.0, dt=0.01, integrator='euler', substeps=1,
+                       fall_angle=np.pi/4, cart_limit=10.0, settle_tolerance=0.05):
+    """
+    Simula um episódio por cenário, todos juntos em um BatchPendulumSimulation.
+
+    Um episódio falha quando o pêndulo cai (|ângulo| > fall_angle) ou o
+    carrinho chega ao limite; a partir daí ele deixa de ser avaliado e
+    integrado (o estado fica congelado no instante da queda). O
+    tempo de acomodação é o instante a partir do qual |ângulo| fica dentro de
+    settle_tolerance até o fim do horizonte, e o sucesso exige não cair e
+    terminar acomodado.
+
+    Args:
+        controller: Controlador com compute_control_batch
+        scenarios (dict): Cenários de sample_scenarios
+
+    Returns:
+        dict: Um array por nome de SCENARIO_METRICS (tempo de acomodação NaN
+            nos episódios sem sucesso, tempo de queda NaN nos que não caíram)
+    """
+    count = len(scenarios['angle'])
+    sim = BatchPendulumSimulation(count, dt=dt, integrator=integrator, substeps=substeps,
+                                  **{key: scenarios[key] for key in ('mass', 'length', 'cart_mass',
+                                                                      'gravity', 'inertia')})
+    sim.reset(**{key: scenarios[key] for key in ('angle', 'angular_velocity', 'cart_position', 'cart_velocity')})
+
+    steps = int(round(horizon / dt))
+    alive = np.ones(count, dtype=bool)
+    fall_step = np.full(count, -1)
+    last_unsettled = np.zeros(count)  # último passo fora da faixa de acomodação
+    effort = np.zeros(count)
+    max_abs_angle = np.abs(sim.angle)
+    forces = np.zeros(count)
+
+    for step in range(steps):
+        active = np.flatnonzero(alive)
+        if active.size == 0:
+            break
+
+        # Só os pêndulos em pé são avaliados pelo controlador
+        forces[:] = 0.0
+        forces[active] = np.clip(controller.compute_control_batch(sim.angle[active], sim.angular_velocity[active]),
+                                 -20, 20)
+        sim.update(forces, active)
+
+        abs_angle = np.abs(sim.angle[active])
+        effort[active] += forces[active] ** 2 * dt
+        max_abs_angle[active] = np.maximum(max_abs_angle[active], abs_angle)
+        last_unsettled[active[abs_angle > settle_tolerance]] = step + 1
+
+        fallen = (abs_angle > fall_angle) | (np.abs(sim.cart_position[active]) >= cart_limit)
+        fall_step[active[fallen]] = step + 1
+        alive[active[fallen]] = False
+
+    final_abs_angle = np.abs(sim.angle)
+    success = alive & (final_abs_angle <= settle_tolerance)
+    return {
+        'success': success,
+        'fall_time': np.where(fall_step >= 0, fall_step * dt, np.nan),
+        'settling_time': np.where(success, last_unsettled * dt, np.nan),
+        'effort': effort,
+        'max_abs_angle': max_abs_angle,
+        'final_abs_angle': final_abs_angle,
+    }
+
+
+def evaluate(controller, samples=1000, plant=None, initial_state=None, seed=None, batch_size=2048,
+             n_workers=1, **episode_params):
+    """
+    Sorteia `samples` cenários e simula todos com `controller`, em lotes de
+    até batch_size pêndulos (distribuídos entre n_workers processos, se > 1).
+
+    Args:
+        controller: Controlador com compute_control_batch (enviado por pickle aos processos)
+        samples (int): Número de cenários
+        plant (dict): Distribuições dos parâmetros físicos
+        initial_state (dict): Distribuições do estado inicial
+        seed (int): Semente dos cenários (os mesmos para qualquer controlador)
+        **episode_params: Parâmetros dos episódios (ver EPISODE_PARAMS)
+
+    Returns:
+        tuple: (cenários, métricas por cenário)
+    """
+    rng = np.random.default_rng(seed)
+    scenarios = sample_scenarios(samples, plant, initial_state, rng)
+    params = {**EPISODE_PARAMS, **episode_params}
+
+    batches = [{key: value[start:start + batch_size] for key, value in scenarios.items()}
+               for start in range(0, samples, batch_size)]
+    simulate = partial(simulate_scenarios, controller, **params)
+    if n_workers <= 1 or len(batches) == 1:
+        results = [simulate(batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(simulate, batches))
+
+    metrics = {name: np.concatenate([result[name] for result in results]) for name in SCENARIO_METRICS}
+    return scenarios, metrics
+
+
+def _distribution_summary(values):
+    """Média, desvio e percentis de valores (ignorando NaN)"""
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return None
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {'mean': float(values.mean()), 'std': float(values.std()), 'p5': float(p5),
+            'p50': float(p50), 'p95': float(p95), 'max': float(values.max())}
+
+
+def summarize(metrics):
+    """
+    Resumo das métricas por cenário: taxas de sucesso e de queda e as
+    distribuições do tempo de acomodação (dos sucessos), do tempo de queda
+    (das quedas), do esforço e do maior ângulo
+    """
+    success = metrics['success']
+    return {
+        'samples': int(success.size),
+        'success_rate': float(success.mean()),
+        'fall_rate': float(np.mean(~np.isnan(metrics['fall_time']))),
+        'settling_time': _distribution_summary(metrics['settling_time']),
+        'fall_time': _distribution_summary(metrics['fall_time']),
+        'effort': _distribution_summary(metrics['effort']),
+        'max_abs_angle': _distribution_summary(metrics['max_abs_angle']),
+    }
+
+
+def main(argv=None):
+    from src.headless.runner import build_controller, load_config
+
+    parser = argparse.ArgumentParser(description="Robustez dos controladores sobre distribuições de pêndulos")
+    parser.add_argument('--controller', nargs='+', default=['FIS', 'Neuro-Fuzzy', 'Genetic-Fuzzy'],
+                        choices=['FIS', 'Neuro-Fuzzy', 'Neuro-Fuzzy-NumPy', 'Genetic-Fuzzy'])
+    parser.add_argument('--config', help="JSON com 'plant', 'initial_state', 'episode' e 'controllers' "
+                                         "(parâmetros de cada controlador, como no executor headless)")
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--horizon', type=float, help="Duração de cada episódio (s)")
+    parser.add_argument('--batch-size', type=int, default=2048, help="Pêndulos simulados juntos")
+    parser.add_argument('--workers', type=int, default=1, help="Processos")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Grava o resumo em JSON (e as métricas por cenário em .npz ao lado)")
+    args = parser.parse_args(argv)
+
+    config = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    episode_params = dict(config.get('episode', {}))
+    if args.horizon is not None:
+        episode_params['horizon'] = args.horizon
+
+    report = {'samples': args.samples, 'seed': args.seed, 'controllers': {}}
+    arrays = {}
+    for name in args.controller:
+        controller_config = {'type': name, **config.get('controllers', {}).get(name, {})}
+        controller = build_controller(load_config(overrides={'controller': controller_config}),
+                                      np.random.default_rng(args.seed))
+
+        start = time.perf_counter()
+        scenarios, metrics = evaluate(controller, args.samples, config.get('plant'), config.get('initial_state'),
+                                      args.seed, args.batch_size, args.workers, **episode_params)
+        elapsed = time.perf_counter() - start
+
+        summary = summarize(metrics)
+        summary['wall_time'] = elapsed
+        report['controllers'][name] = summary
+        arrays.update({f'{name}/{key}': value for key, value in metrics.items()})
+        arrays.update({f'scenario/{key}': value for key, value in scenarios.items()})
+
+        settling = summary['settling_time']
+        print(f"{name}: sucesso {summary['success_rate']:.1%}, queda {summary['fall_rate']:.1%}, "
+              f"acomodação p50 {settling['p50'] if settling else float('nan'):.2f} s, "
+              f"esforço médio {summary['effort']['mean']:.1f}, {args.samples / elapsed:.0f} cenários/s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        np.savez_compressed(args.output.rsplit('.', 1)[0] + '_scenarios.npz', **arrays)
+        print(f"Resultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
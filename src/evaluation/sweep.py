@@ -0,0 +1,233 @@
+"""
+Varredura de parâmetros com cache em disco.
+
+Cada ponto da grade é uma configuração no formato do executor headless
+(controlador, planta, semente) mais os parâmetros da avaliação de Monte
+Carlo ('monte_carlo'). O resultado de cada ponto fica em cache em um arquivo
+JSON cujo nome é o hash da configuração completa e da versão do código
+(hash dos fontes em src/), de modo que repetir uma varredura só calcula os
+pontos novos ou invalidados por mudanças no código. Os pontos que faltam são
+distribuídos entre processos e gravados no cache assim que terminam, então
+uma varredura interrompida continua de onde parou.
+
+Uso:
+    python -m src.evaluation.sweep --config varredura.json --workers 8 --output varredura_resultados.json
+
+Arquivo de varredura (as chaves da grade são caminhos na configuração):
+    {
+        "base": {"controller": {"type": "FIS"}, "monte_carlo": {"samples": 2000}},
+        "grid": {"controller.params.gain": [0.3, 0.5, 0.7], "seed": [0, 1]}
+    }
+"""
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from src.evaluation import monte_carlo
+from src.headless.runner import DEFAULT_CONFIG, build_controller, merge_config
+
+# Configuração padrão de um ponto: a do executor headless, semente fixa e os
+# parâmetros da avaliação de Monte Carlo. Os parâmetros físicos avaliados vêm
+# das distribuições de 'monte_carlo' (padrão: as de monte_carlo.PLANT_DISTRIBUTIONS);
+# de 'simulation' vêm o passo e o integrador (e a planta do fitness 'rollout')
+SWEEP_DEFAULTS = merge_config(DEFAULT_CONFIG, {
+    'seed': 0,
+    'monte_carlo': {
+        'samples': 1000,
+        'plant': {},
+        'initial_state': {},
+        'episode': {},
+        'batch_size': 2048,
+    },
+})
+
+# Diretório dos fontes que entram na versão do código
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_code_version = None
+
+
+def code_version():
+    """Hash do conteúdo dos fontes em src/ (exceto a interface gráfica), calculado uma vez"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(SOURCE_DIR):
+            dirs[:] = sorted(d for d in dirs if d not in ('gui', '__pycache__'))
+            for name in sorted(files):
+                if name.endswith('.py'):
+                    path = os.path.join(root, name)
+                    digest.update(os.path.relpath(path, SOURCE_DIR).encode())
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+def set_path(config, path, value):
+    """Atribui `value` na chave de caminho 'a.b.c' de `config`"""
+    *parents, key = path.split('.')
+    for parent in parents:
+        config = config.setdefault(parent, {})
+    config[key] = value
+
+
+def expand_grid(base, grid):
+    """
+    Produto cartesiano da grade sobre a configuração base.
+
+    Returns:
+        list: Pares (valores do ponto {caminho: valor}, configuração completa)
+    """
+    base = merge_config(SWEEP_DEFAULTS, base or {})
+    paths = list(grid)
+    points = []
+    for values in itertools.product(*(grid[path] for path in paths)):
+        config = copy.deepcopy(base)
+        for path, value in zip(paths, values):
+            set_path(config, path, value)
+        points.append((dict(zip(paths, values)), config))
+    return points
+
+
+def cache_key(config):
+    """Hash da configuração completa e da versão do código"""
+    payload = json.dumps({'config': config, 'code_version': code_version()}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def run_point(config):
+    """
+    Monta o controlador do ponto e o avalia por Monte Carlo.
+
+    Returns:
+        dict: Resumo da avaliação (ver monte_carlo.summarize) e tempo gasto
+    """
+    start = time.perf_counter()
+    config = copy.deepcopy(config)
+    # Controladores com sorteio próprio usam a semente do ponto, para o
+    # resultado depender só da configuração
+    if config['controller']['type'] in ('Neuro-Fuzzy', 'Genetic-Fuzzy'):
+        config['controller'].setdefault('params', {}).setdefault('seed', config['seed'])
+    controller = build_controller(config, np.random.default_rng(config['seed']))
+
+    mc = config['monte_carlo']
+    episode = {'dt': config['simulation']['dt'], 'integrator': config['simulation']['integrator'],
+               'substeps': config['simulation']['substeps'], **mc['episode']}
+    _, metrics = monte_carlo.evaluate(controller, mc['samples'], mc['plant'], mc['initial_state'], config['seed'],
+                                      mc['batch_size'], **episode)
+    summary = monte_carlo.summarize(metrics)
+    summary['wall_time'] = time.perf_counter() - start
+    return summary
+
+
+class ResultCache:
+    """Resultados por chave, um arquivo JSON por ponto em `directory`"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Resultado gravado para a chave, ou None (também se o arquivo estiver corrompido)"""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)['result']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, config, result):
+        """Grava o resultado (de forma atômica: arquivo temporário + rename)"""
+        temporary = self._path(key) + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'code_version': code_version(), 'result': result}, f,
+                      indent=2, ensure_ascii=False, default=str)
+        os.replace(temporary, self._path(key))
+
+
+def sweep(base, grid, cache_dir='.sweep_cache', n_workers=1, recompute=False):
+    """
+    Avalia todos os pontos da grade, usando o cache para os já calculados.
+
+    Args:
+        base (dict): Configuração base (sobre SWEEP_DEFAULTS)
+        grid (dict): Valores de cada caminho da configuração ({'controller.params.gain': [...]})
+        cache_dir (str): Diretório do cache (None desliga o cache)
+        n_workers (int): Processos para os pontos que faltam
+        recompute (bool): Recalcula todos os pontos (e regrava o cache)
+
+    Returns:
+        list: Um dicionário por ponto com 'params', 'key', 'cached' e 'result'
+    """
+    cache = ResultCache(cache_dir) if cache_dir else None
+    rows = []
+    missing = []
+    for params, config in expand_grid(base, grid):
+        key = cache_key(config)
+        result = None if (cache is None or recompute) else cache.get(key)
+        rows.append({'params': params, 'key': key, 'cached': result is not None, 'result': result})
+        if result is None:
+            missing.append((len(rows) - 1, config))
+    print(f"{len(rows)} pontos: {len(rows) - len(missing)} no cache, {len(missing)} a calcular")
+
+    def store(index, config, result):
+        rows[index]['result'] = result
+        if cache is not None:
+            cache.put(rows[index]['key'], config, result)
+        print(f"[{sum(row['result'] is not None for row in rows)}/{len(rows)}] {rows[index]['params']}: "
+              f"sucesso {result['success_rate']:.1%} ({result['wall_time']:.1f} s)")
+
+    if n_workers <= 1 or len(missing) <= 1:
+        for index, config in missing:
+            store(index, config, run_point(config))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {executor.submit(run_point, config): (index, config) for index, config in missing}
+            for future in as_completed(futures):
+                store(*futures[future], future.result())
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros dos controladores com cache em disco")
+    parser.add_argument('--config', required=True, help="JSON com 'base' e 'grid'")
+    parser.add_argument('--workers', type=int, default=1, help="Processos")
+    parser.add_argument('--cache', default='.sweep_cache', help="Diretório do cache")
+    parser.add_argument('--recompute', action='store_true', help="Ignora o cache e recalcula todos os pontos")
+    parser.add_argument('--output', help="Grava os resultados de todos os pontos em JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        sweep_config = json.load(f)
+
+    start = time.perf_counter()
+    rows = sweep(sweep_config.get('base', {}), sweep_config['grid'], args.cache, args.workers, args.recompute)
+    print(f"Varredura concluída em {time.perf_counter() - start:.1f} s\n")
+
+    ranked = sorted(rows, key=lambda row: (-row['result']['success_rate'], row['result']['effort']['mean']))
+    for row in ranked:
+        result = row['result']
+        settling = result['settling_time']
+        print(f"sucesso {result['success_rate']:>6.1%}  acomodação p50 "
+              f"{settling['p50'] if settling else float('nan'):>5.2f} s  esforço médio "
+              f"{result['effort']['mean']:>8.1f}  {row['params']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'code_version': code_version(), 'points': rows}, f, indent=2, ensure_ascii=False,
+                      default=str)
+        print(f"\nResultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+import numpy as np
+
+class EvolutionWorker(QObject):
+    """
+    Executa várias gerações do Genetic-Fuzzy fora da thread da interface.
+
+    O worker evolui a sua própria cópia do controlador (o controlador da
+    simulação continua sendo usado apenas pela thread da interface) e emite,
+    a cada geração, o fitness e uma cópia do melhor indivíduo, que a janela
+    troca no controlador em execução.
+    """
+
+    # geração, melhor fitness da geração, fitness médio, melhor fitness global, melhor indivíduo
+    generation_finished = pyqtSignal(int, float, float, float, object)
+    # True se a evolução foi cancelada
+    finished = pyqtSignal(bool)
+
+    def __init__(self, optimizer, test_cases, generations):
+        """
+        Args:
+            optimizer (GeneticFuzzyController): Controlador evoluído pelo worker
+            test_cases (array-like): Casos de teste (ou condições iniciais, no modo 'rollout')
+            generations (int): Número de gerações
+        """
+        super().__init__()
+        self.optimizer = optimizer
+        self.test_cases = test_cases
+        self.generations = generations
+        self._cancelled = False
+
+    def cancel(self):
+        """Pede o cancelamento; a geração em andamento termina normalmente"""
+        self._cancelled = True
+
+    def run(self):
+        """Evolui até completar as gerações ou ser cancelado"""
+        try:
+            for generation in range(1, self.generations + 1):
+                if self._cancelled:
+                    break
+                fitness_scores = self.optimizer.evolve(self.test_cases)
+                best_individual = {key: value.copy() for key, value in self.optimizer.best_individual.items()}
+                self.generation_finished.emit(generation, float(np.max(fitness_scores)),
+                                              float(np.mean(fitness_scores)),
+                                              float(self.optimizer.best_fitness), best_individual)
+        except Exception as e:
+            print(f"Erro na evolução: {str(e)}")
+        self.finished.emit(self._cancelled)
@@ -1,18 +1,40 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QPushButton, 
                             QLabel, QHBoxLayout, QComboBox, QSpinBox, QDoubleSpinBox,
-                            QGroupBox, QSlider, QStackedWidget)
-from PyQt5.QtCore import Qt, QTimer
-import matplotlib.pyplot as plt
+                            QGroupBox, QSlider, QStackedWidget, QCheckBox)
+from PyQt5.QtCore import Qt, QTimer, QThread
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
+import copy
+import time
 import numpy as np
 
+from src.controllers.fuzzy_cache import cache_stats
+from src.gui.evolution_worker import EvolutionWorker
+from src.gui.startup import STARTUP_TIMER
+from src.simulation.instrumentation import TickProfiler
 from src.simulation.pendulum_sim import PendulumSimulation
-from src.controllers.fis_controller import FISController
-from src.controllers.neuro_fuzzy import NeuroFuzzyController
-from src.controllers.genetic_fuzzy import GeneticFuzzyController
+from src.simulation.recorder import TrajectoryRecorder
+
+# Módulo e classe de cada controlador. Os módulos só são importados quando o
+# controlador é escolhido pela primeira vez (o Neuro-Fuzzy carrega o PyTorch)
+CONTROLLER_CLASSES = {
+    "FIS": ('src.controllers.fis_controller', 'FISController'),
+    "Neuro-Fuzzy": ('src.controllers.neuro_fuzzy', 'NeuroFuzzyController'),
+    "Genetic-Fuzzy": ('src.controllers.genetic_fuzzy', 'GeneticFuzzyController'),
+}
+
+def load_controller_class(controller_name):
+    """Importa (na primeira vez) e retorna a classe do controlador"""
+    module_name, class_name = CONTROLLER_CLASSES[controller_name]
+    return getattr(STARTUP_TIMER.import_module(module_name), class_name)
 
 class MainWindow(QMainWindow):
+    # Período do timer de física e tempo máximo gasto em física por chamada
+    PHYSICS_INTERVAL_MS = 5
+    PHYSICS_BUDGET_S = 0.015
+    # Intervalo sem mudanças antes de aplicar os parâmetros do controlador
+    PARAMS_DEBOUNCE_MS = 150
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Controle de Pêndulo Invertido")
@@ -172,9 +194,30 @@ class MainWindow(QMainWindow):
         elite_layout.addWidget(self.elite_spin)
         genetic_fuzzy_layout.addLayout(elite_layout)
         
-        # Botão de evolução
+        # Função de fitness
+        fitness_layout = QHBoxLayout()
+        fitness_label = QLabel("Fitness:")
+        self.fitness_combo = QComboBox()
+        self.fitness_combo.addItems(["Casos de teste", "Simulação"])
+        fitness_layout.addWidget(fitness_label)
+        fitness_layout.addWidget(self.fitness_combo)
+        genetic_fuzzy_layout.addLayout(fitness_layout)
+        
+        # Número de gerações por evolução
+        generations_layout = QHBoxLayout()
+        generations_label = QLabel("Gerações:")
+        self.generations_spin = QSpinBox()
+        self.generations_spin.setRange(1, 1000)
+        self.generations_spin.setValue(20)
+        generations_layout.addWidget(generations_label)
+        generations_layout.addWidget(self.generations_spin)
+        genetic_fuzzy_layout.addLayout(generations_layout)
+        
+        # Botão de evolução (vira "Cancelar" durante a evolução)
         self.evolve_button = QPushButton("Evoluir")
         genetic_fuzzy_layout.addWidget(self.evolve_button)
+        self.evolution_label = QLabel("")
+        genetic_fuzzy_layout.addWidget(self.evolution_label)
         
         # Adiciona os widgets ao stack
         self.controller_params_stack.addWidget(fis_widget)
@@ -252,6 +295,43 @@ class MainWindow(QMainWindow):
         dt_layout.addWidget(self.dt_spin)
         pendulum_layout.addLayout(dt_layout)
         
+        # Integrador numérico
+        integrator_layout = QHBoxLayout()
+        integrator_label = QLabel("Integrador:")
+        self.integrator_combo = QComboBox()
+        self.integrator_combo.addItems(["euler", "rk4", "rk45"])
+        integrator_layout.addWidget(integrator_label)
+        integrator_layout.addWidget(self.integrator_combo)
+        pendulum_layout.addLayout(integrator_layout)
+        
+        # Subpassos de física por período de controle (dt)
+        substeps_layout = QHBoxLayout()
+        substeps_label = QLabel("Subpassos:")
+        self.substeps_spin = QSpinBox()
+        self.substeps_spin.setRange(1, 100)
+        self.substeps_spin.setValue(1)
+        self.substeps_spin.setSingleStep(1)
+        substeps_layout.addWidget(substeps_label)
+        substeps_layout.addWidget(self.substeps_spin)
+        pendulum_layout.addLayout(substeps_layout)
+        
+        # Velocidade da simulação em relação ao tempo real e taxa máxima de quadros
+        speed_layout = QHBoxLayout()
+        speed_label = QLabel("Velocidade:")
+        self.speed_combo = QComboBox()
+        self.speed_combo.addItems(["1×", "10×", "Máxima"])
+        speed_layout.addWidget(speed_label)
+        speed_layout.addWidget(self.speed_combo)
+        
+        render_fps_layout = QHBoxLayout()
+        render_fps_label = QLabel("FPS Máximo:")
+        self.render_fps_spin = QSpinBox()
+        self.render_fps_spin.setRange(5, 120)
+        self.render_fps_spin.setValue(60)
+        self.render_fps_spin.setSingleStep(5)
+        render_fps_layout.addWidget(render_fps_label)
+        render_fps_layout.addWidget(self.render_fps_spin)
+        
         # Botões de controle
         self.start_button = QPushButton("Iniciar")
         self.stop_button = QPushButton("Parar")
@@ -261,23 +341,97 @@ class MainWindow(QMainWindow):
         control_layout.addWidget(controller_group)
         control_layout.addWidget(self.controller_params_stack)
         control_layout.addWidget(pendulum_group)
+        control_layout.addLayout(speed_layout)
+        control_layout.addLayout(render_fps_layout)
         control_layout.addWidget(self.start_button)
         control_layout.addWidget(self.stop_button)
         control_layout.addWidget(self.reset_button)
         
+        # Taxa de quadros medida
+        self.fps_label = QLabel("FPS: - | Tempo simulado: 0.0 s")
+        control_layout.addWidget(self.fps_label)
+        
+        # Instrumentação: tempos por etapa sobrepostos ao gráfico e perfil por amostragem
+        instrumentation_layout = QHBoxLayout()
+        self.instrumentation_check = QCheckBox("Instrumentação")
+        self.profile_button = QPushButton("Gravar Perfil")
+        instrumentation_layout.addWidget(self.instrumentation_check)
+        instrumentation_layout.addWidget(self.profile_button)
+        control_layout.addLayout(instrumentation_layout)
+        
+        profile_ticks_layout = QHBoxLayout()
+        profile_ticks_label = QLabel("Iterações do Perfil:")
+        self.profile_ticks_spin = QSpinBox()
+        self.profile_ticks_spin.setRange(10, 100000)
+        self.profile_ticks_spin.setValue(500)
+        self.profile_ticks_spin.setSingleStep(100)
+        profile_ticks_layout.addWidget(profile_ticks_label)
+        profile_ticks_layout.addWidget(self.profile_ticks_spin)
+        control_layout.addLayout(profile_ticks_layout)
+        
+        # Gravação da trajetória (estado, força e tempo de cada passo) em disco
+        self.record_check = QCheckBox("Gravar Trajetória")
+        control_layout.addWidget(self.record_check)
+        
         # Adiciona o painel de controle ao layout principal
         layout.addWidget(control_panel)
         
         # Área de visualização
+        view_layout = QVBoxLayout()
+        layout.addLayout(view_layout)
         self.figure = Figure(figsize=(8, 6))
         self.canvas = FigureCanvas(self.figure)
-        layout.addWidget(self.canvas)
+        view_layout.addWidget(self.canvas, 3)
+        self.setup_plot()
+        
+        # Tempos por etapa: cada passo de física (controlador + física) e cada quadro
+        self.tick_profiler = TickProfiler(('controller', 'physics'))
+        self.render_profiler = TickProfiler(('render',))
+        self.overlay_label = QLabel(self.canvas)
+        self.overlay_label.setStyleSheet("background-color: rgba(255, 255, 255, 200); font-family: monospace;")
+        self.overlay_label.move(10, 10)
+        self.overlay_label.hide()
+        
+        # Curva de convergência do Genetic-Fuzzy
+        self.convergence_figure = Figure(figsize=(8, 2))
+        self.convergence_canvas = FigureCanvas(self.convergence_figure)
+        view_layout.addWidget(self.convergence_canvas, 1)
+        self.convergence_ax = self.convergence_figure.add_subplot(111)
+        self.best_fitness_line, = self.convergence_ax.plot([], [], 'g-', label='Melhor')
+        self.mean_fitness_line, = self.convergence_ax.plot([], [], 'b-', label='Média')
+        self.convergence_ax.set_xlabel('Geração')
+        self.convergence_ax.set_ylabel('Fitness')
+        self.convergence_ax.legend(loc='lower right')
+        self.convergence_ax.grid(True)
+        self.convergence_figure.tight_layout()
+        
+        # Evolução em segundo plano
+        self.evolution_thread = None
+        self.evolution_worker = None
+        self.evolution_target = None
         
         # Inicialização dos sistemas
         self.simulation = None
         self.controller = None
+        self.controller_name = None
+        # Física/controle e desenho em timers separados: a física segue o tempo
+        # simulado (na velocidade escolhida) e o desenho mostra o estado mais
+        # recente a uma taxa limitada
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_simulation)
+        self.render_timer = QTimer()
+        self.render_timer.timeout.connect(self.update_plot)
+        self.sim_time = 0.0
+        self.sim_debt = 0.0
+        self.last_tick = None
+        self.recorder = None
+        
+        # Mudanças seguidas nos parâmetros do controlador (por exemplo, rolando
+        # um spin box) são aplicadas de uma vez, após um intervalo sem mudanças
+        self.params_timer = QTimer()
+        self.params_timer.setSingleShot(True)
+        self.params_timer.setInterval(self.PARAMS_DEBOUNCE_MS)
+        self.params_timer.timeout.connect(self.update_controller_params)
         
         # Conecta os sinais
         self.start_button.clicked.connect(self.start_simulation)
@@ -287,21 +441,28 @@ class MainWindow(QMainWindow):
         self.evolve_button.clicked.connect(self.evolve_controller)
         
         # Conecta os sinais dos parâmetros
-        self.gain_spin.valueChanged.connect(self.update_controller_params)
-        self.angle_spin.valueChanged.connect(self.update_controller_params)
-        self.velocity_spin.valueChanged.connect(self.update_controller_params)
-        self.force_spin.valueChanged.connect(self.update_controller_params)
-        self.lr_spin.valueChanged.connect(self.update_controller_params)
-        self.rules_spin.valueChanged.connect(self.update_controller_params)
-        self.pop_spin.valueChanged.connect(self.update_controller_params)
-        self.mut_spin.valueChanged.connect(self.update_controller_params)
-        self.elite_spin.valueChanged.connect(self.update_controller_params)
+        self.gain_spin.valueChanged.connect(self.schedule_controller_update)
+        self.angle_spin.valueChanged.connect(self.schedule_controller_update)
+        self.velocity_spin.valueChanged.connect(self.schedule_controller_update)
+        self.force_spin.valueChanged.connect(self.schedule_controller_update)
+        self.lr_spin.valueChanged.connect(self.schedule_controller_update)
+        self.rules_spin.valueChanged.connect(self.schedule_controller_update)
+        self.pop_spin.valueChanged.connect(self.schedule_controller_update)
+        self.mut_spin.valueChanged.connect(self.schedule_controller_update)
+        self.elite_spin.valueChanged.connect(self.schedule_controller_update)
+        self.fitness_combo.currentTextChanged.connect(self.schedule_controller_update)
         self.mass_spin.valueChanged.connect(self.update_simulation_params)
         self.length_spin.valueChanged.connect(self.update_simulation_params)
         self.cart_mass_spin.valueChanged.connect(self.update_simulation_params)
         self.gravity_spin.valueChanged.connect(self.update_simulation_params)
         self.dt_spin.valueChanged.connect(self.update_simulation_params)
         self.inertia_spin.valueChanged.connect(self.update_simulation_params)
+        self.integrator_combo.currentTextChanged.connect(self.update_simulation_params)
+        self.substeps_spin.valueChanged.connect(self.update_simulation_params)
+        self.render_fps_spin.valueChanged.connect(self.update_render_rate)
+        self.instrumentation_check.toggled.connect(self.toggle_instrumentation)
+        self.profile_button.clicked.connect(self.record_profile)
+        self.record_check.toggled.connect(self.toggle_recording)
         
         # Inicializa o sistema
         self.initialize_systems()
@@ -315,64 +476,161 @@ class MainWindow(QMainWindow):
             cart_mass=self.cart_mass_spin.value(),
             gravity=self.gravity_spin.value(),
             dt=self.dt_spin.value(),
-            inertia=inertia_value
+            inertia=inertia_value,
+            integrator=self.integrator_combo.currentText(),
+            substeps=self.substeps_spin.value()
         )
         self.change_controller(self.controller_combo.currentText())
         
     def change_controller(self, controller_name):
         """Muda o controlador atual"""
+        # Uma evolução em andamento pertence ao controlador anterior
+        if self.evolution_worker is not None:
+            self.evolution_worker.cancel()
+            
+        self.controller_name = controller_name
         if controller_name == "FIS":
-            self.controller = FISController()
+            self.controller = load_controller_class(controller_name)()
             self.controller_params_stack.setCurrentIndex(0)
             self.update_controller_params()
         elif controller_name == "Neuro-Fuzzy":
-            self.controller = NeuroFuzzyController(
+            self.controller = load_controller_class(controller_name)(
                 learning_rate=self.lr_spin.value(),
                 num_rules=self.rules_spin.value()
             )
             self.controller_params_stack.setCurrentIndex(1)
         elif controller_name == "Genetic-Fuzzy":
-            self.controller = GeneticFuzzyController(
+            self.controller = load_controller_class(controller_name)(
                 population_size=self.pop_spin.value(),
                 mutation_rate=self.mut_spin.value(),
-                elite_size=self.elite_spin.value()
+                elite_size=self.elite_spin.value(),
+                fitness_mode='rollout' if self.fitness_combo.currentText() == "Simulação" else 'cases'
             )
             self.controller_params_stack.setCurrentIndex(2)
             
+    def schedule_controller_update(self):
+        """Agenda update_controller_params, reiniciando a espera a cada nova mudança"""
+        self.params_timer.start()
+        
     def update_controller_params(self):
         """Atualiza os parâmetros do controlador"""
-        if isinstance(self.controller, FISController):
+        self.params_timer.stop()
+        if self.controller_name == "FIS":
             self.controller.update_parameters(
                 gain=self.gain_spin.value(),
                 angle_range=self.angle_spin.value(),
                 velocity_range=self.velocity_spin.value(),
                 force_range=self.force_spin.value()
             )
-        elif isinstance(self.controller, NeuroFuzzyController):
+        elif self.controller_name == "Neuro-Fuzzy":
             self.controller.learning_rate = self.lr_spin.value()
             self.controller.num_rules = self.rules_spin.value()
-        elif isinstance(self.controller, GeneticFuzzyController):
+        elif self.controller_name == "Genetic-Fuzzy":
             self.controller.update_parameters(
                 population_size=self.pop_spin.value(),
                 mutation_rate=self.mut_spin.value(),
-                elite_size=self.elite_spin.value()
+                elite_size=self.elite_spin.value(),
+                fitness_mode='rollout' if self.fitness_combo.currentText() == "Simulação" else 'cases'
             )
             
+    def evolution_cases(self):
+        """
+        Casos de teste (ou condições iniciais, no modo 'rollout') para uma
+        evolução, sorteados com o gerador do controlador: a evolução inteira
+        depende apenas da semente dele
+        """
+        rng = self.controller.rng
+        if self.controller.fitness_mode == 'rollout':
+            # Condições iniciais (ângulo, velocidade angular) simuladas com os
+            # parâmetros atuais do pêndulo
+            self.controller.update_parameters(rollout_params=self.plant_parameters())
+            return np.column_stack([
+                rng.uniform(-0.3, 0.3, 10),
+                rng.uniform(-1, 1, 10)
+            ])
+        
+        # Força alvo baseada em um controlador PID simples
+        angles = rng.uniform(-np.pi/2, np.pi/2, 100)
+        velocities = rng.uniform(-5, 5, 100)
+        return np.column_stack([angles, velocities, -2 * angles - 1 * velocities])
+        
     def evolve_controller(self):
-        """Realiza uma geração de evolução do controlador Genetic-Fuzzy"""
-        if isinstance(self.controller, GeneticFuzzyController):
-            # Gera casos de teste para evolução
-            test_cases = []
-            for _ in range(100):
-                angle = np.random.uniform(-np.pi/2, np.pi/2)
-                velocity = np.random.uniform(-5, 5)
-                # Força alvo baseada em um controlador PID simples
-                target_force = -2 * angle - 1 * velocity
-                test_cases.append((angle, velocity, target_force))
-            
-            # Realiza a evolução
-            self.controller.evolve(test_cases)
+        """
+        Evolui o controlador Genetic-Fuzzy por várias gerações em uma thread
+        separada, sem parar a simulação; se já houver uma evolução em
+        andamento, cancela-a
+        """
+        if self.evolution_thread is not None:
+            self.evolution_worker.cancel()
+            self.evolve_button.setEnabled(False)
+            return
+        if self.controller_name != "Genetic-Fuzzy":
+            return
+        
+        # O worker evolui uma cópia; o controlador da simulação só recebe o
+        # melhor indivíduo a cada geração (na thread da interface)
+        test_cases = self.evolution_cases()
+        self.evolution_target = self.controller
+        self.evolution_worker = EvolutionWorker(copy.deepcopy(self.controller), test_cases,
+                                                self.generations_spin.value())
+        self.evolution_thread = QThread()
+        self.evolution_worker.moveToThread(self.evolution_thread)
+        self.evolution_thread.started.connect(self.evolution_worker.run)
+        self.evolution_worker.generation_finished.connect(self.on_generation_finished)
+        self.evolution_worker.finished.connect(self.on_evolution_finished)
+        
+        self.fitness_history = []
+        self.best_fitness_line.set_data([], [])
+        self.mean_fitness_line.set_data([], [])
+        self.convergence_canvas.draw_idle()
+        self.evolve_button.setText("Cancelar")
+        self.evolution_thread.start()
+        
+    def on_generation_finished(self, generation, best_fitness, mean_fitness, overall_best, best_individual):
+        """Atualiza a curva de convergência e troca o melhor indivíduo no controlador em execução"""
+        self.fitness_history.append((generation, best_fitness, mean_fitness))
+        generations, best, mean = np.array(self.fitness_history).T
+        self.best_fitness_line.set_data(generations, best)
+        self.mean_fitness_line.set_data(generations, mean)
+        self.convergence_ax.relim()
+        self.convergence_ax.autoscale_view()
+        self.convergence_canvas.draw_idle()
+        self.evolution_label.setText(f"Geração {generation}/{self.evolution_worker.generations}: "
+                                     f"melhor {best_fitness:.4f}, média {mean_fitness:.4f}")
+        
+        if self.controller is self.evolution_target and overall_best > self.controller.best_fitness:
+            self.controller.set_best_individual(best_individual, overall_best)
             
+    def on_evolution_finished(self, cancelled):
+        """Encerra a thread de evolução e mantém a população evoluída no controlador"""
+        self.evolution_thread.quit()
+        self.evolution_thread.wait()
+        optimizer = self.evolution_worker.optimizer
+        if self.controller is self.evolution_target and optimizer.population_size == self.controller.population_size:
+            self.controller.resume_evolution(optimizer)
+        if cancelled:
+            self.evolution_label.setText(self.evolution_label.text() + " (cancelada)")
+        
+        self.evolution_thread = None
+        self.evolution_worker = None
+        self.evolution_target = None
+        self.evolve_button.setText("Evoluir")
+        self.evolve_button.setEnabled(True)
+        
+    def plant_parameters(self):
+        """Parâmetros físicos e de integração atuais, no formato de BatchPendulumSimulation"""
+        inertia_value = self.inertia_spin.value()
+        return {
+            'mass': self.mass_spin.value(),
+            'length': self.length_spin.value(),
+            'cart_mass': self.cart_mass_spin.value(),
+            'gravity': self.gravity_spin.value(),
+            'dt': self.dt_spin.value(),
+            'inertia': inertia_value if inertia_value > 0 else None,
+            'integrator': self.integrator_combo.currentText(),
+            'substeps': self.substeps_spin.value()
+        }
+        
     def update_simulation_params(self):
         """Atualiza os parâmetros da simulação"""
         if self.simulation:
@@ -381,60 +639,109 @@ class MainWindow(QMainWindow):
             self.simulation.cart_mass = self.cart_mass_spin.value()
             self.simulation.gravity = self.gravity_spin.value()
             self.simulation.dt = self.dt_spin.value()
+            self.simulation.integrator = self.integrator_combo.currentText()
+            self.simulation.substeps = self.substeps_spin.value()
             inertia_value = self.inertia_spin.value()
             if inertia_value > 0:
                 self.simulation.inertia = inertia_value
             else:
                 self.simulation.inertia = self.simulation.mass * self.simulation.length ** 2
             
+    def closeEvent(self, event):
+        """Cancela a evolução em andamento antes de fechar a janela"""
+        if self.evolution_thread is not None:
+            self.evolution_worker.cancel()
+            self.evolution_thread.quit()
+            self.evolution_thread.wait()
+        self.toggle_recording(False)
+        super().closeEvent(event)
+        
     def start_simulation(self):
         """Inicia a simulação"""
         if not self.timer.isActive():
-            self.timer.start(10)  # 10ms = 100Hz
+            self.sim_debt = 0.0
+            self.last_tick = time.perf_counter()
+            self.timer.start(self.PHYSICS_INTERVAL_MS)
+            self.update_render_rate()
             
     def stop_simulation(self):
         """Para a simulação"""
         self.timer.stop()
+        self.render_timer.stop()
         
     def reset_simulation(self):
         """Reseta a simulação"""
         self.stop_simulation()
         self.initialize_systems()
+        self.sim_time = 0.0
         self.update_plot()
         
+    def update_render_rate(self):
+        """Aplica a taxa máxima de quadros ao timer de desenho"""
+        if self.timer.isActive():
+            self.render_timer.start(int(1000 / self.render_fps_spin.value()))
+            
+    def simulation_speed(self):
+        """Fator de velocidade em relação ao tempo real (None = o mais rápido possível)"""
+        return {"1×": 1.0, "10×": 10.0}.get(self.speed_combo.currentText())
+        
     def update_simulation(self):
-        """Atualiza a simulação em um passo"""
+        """
+        Avança a simulação até alcançar o tempo simulado correspondente ao
+        tempo real decorrido vezes a velocidade escolhida, sem passar do
+        orçamento de tempo por chamada (para a interface continuar
+        respondendo). Na velocidade máxima, usa todo o orçamento.
+        """
+        now = time.perf_counter()
+        speed = self.simulation_speed()
+        dt = self.simulation.dt
+        if speed is not None:
+            self.sim_debt += (now - self.last_tick) * speed
+        self.last_tick = now
+        
+        deadline = now + self.PHYSICS_BUDGET_S
         try:
-            state = self.simulation.update(
-                self.controller.compute_control(
+            profiler = self.tick_profiler
+            while (speed is None or self.sim_debt >= dt) and time.perf_counter() < deadline:
+                step_start = time.perf_counter()
+                profiler.start_tick()
+                force = self.controller.compute_control(
                     self.simulation.angle,
                     self.simulation.angular_velocity
                 )
-            )
-            self.update_plot()
+                profiler.mark('controller')
+                state = self.simulation.update(force)
+                profiler.mark('physics')
+                profiler.end_tick()
+                self.sim_time += dt
+                if self.recorder is not None:
+                    # Força efetivamente aplicada (o simulador a limita a ±20 N)
+                    self.recorder.record_state(self.sim_time, state, min(max(force, -20.0), 20.0),
+                                               time.perf_counter() - step_start)
+                self.sim_debt -= dt
         except Exception as e:
             print(f"Erro na simulação: {str(e)}")
             self.stop_simulation()
-        
-    def update_plot(self):
-        """Atualiza o gráfico do pêndulo"""
-        self.figure.clear()
+            
+        # Atraso que não coube no orçamento é descartado (a simulação fica mais
+        # lenta que o pedido em vez de acumular atraso indefinidamente)
+        self.sim_debt = min(max(self.sim_debt, 0.0), dt)
+        
+    def setup_plot(self):
+        """
+        Cria os eixos e os artistas do pêndulo uma única vez. O fundo estático
+        (trilhos, grade, eixos) é guardado a cada redesenho completo e cada
+        quadro só redesenha o carrinho e o pêndulo por cima dele (blitting).
+        """
         ax = self.figure.add_subplot(111)
-        
-        # Desenha o pêndulo
-        x = self.simulation.cart_position
-        y = 0
-        pendulum_x = x + self.simulation.length * np.sin(self.simulation.angle)
-        pendulum_y = -self.simulation.length * np.cos(self.simulation.angle)
+        self.ax = ax
         
         # Desenha trilhos
         ax.plot([-10, 10], [0, 0], 'k--', linewidth=1)
         
-        # Desenha o carrinho
-        ax.plot([x-0.5, x+0.5], [y, y], 'b-', linewidth=4)
-        
-        # Desenha o pêndulo
-        ax.plot([x, pendulum_x], [y, pendulum_y], 'r-', linewidth=2)
+        # Carrinho e pêndulo: apenas os dados mudam a cada quadro
+        self.cart_line, = ax.plot([], [], 'b-', linewidth=4, animated=True)
+        self.pendulum_line, = ax.plot([], [], 'r-', linewidth=2, animated=True)
         
         # Configura o gráfico fixo
         ax.set_xlim(-10, 10)
@@ -442,4 +749,93 @@ class MainWindow(QMainWindow):
         ax.set_aspect('equal')
         ax.grid(True)
         
-        self.canvas.draw() 
\ No newline at end of file
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        
+        # Contagem de quadros para o FPS
+        self.frame_count = 0
+        self.fps_time = time.perf_counter()
+        
+    def on_draw(self, event):
+        """
+        Guarda o fundo após um redesenho completo (início, redimensionamento)
+        e desenha o pêndulo sobre ele. Sem blit: o canvas ainda está pintando,
+        e a cópia para a tela fica com o timer de desenho (draw_pendulum).
+        """
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.cart_line)
+        self.ax.draw_artist(self.pendulum_line)
+        
+    def draw_pendulum(self):
+        """Redesenha apenas os artistas animados sobre o fundo guardado"""
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.cart_line)
+        self.ax.draw_artist(self.pendulum_line)
+        self.canvas.blit(self.ax.bbox)
+        
+    def toggle_instrumentation(self, enabled):
+        """Liga ou desliga a medição por etapa e a sobreposição com as estatísticas"""
+        for profiler in (self.tick_profiler, self.render_profiler):
+            profiler.enabled = enabled or profiler.profiling
+            profiler.reset()
+        self.overlay_label.setVisible(enabled)
+        
+    def record_profile(self):
+        """Grava um perfil por amostragem das próximas iterações de física"""
+        path = time.strftime("perfil_%Y%m%d_%H%M%S.txt")
+        self.tick_profiler.profile_ticks(self.profile_ticks_spin.value(), path)
+        
+    def toggle_recording(self, enabled):
+        """Abre ou fecha o arquivo da gravação da trajetória"""
+        try:
+            if enabled and self.recorder is None:
+                self.recorder = TrajectoryRecorder(time.strftime("trajetoria_%Y%m%d_%H%M%S"))
+            elif not enabled and self.recorder is not None:
+                self.recorder.close()
+                print(f"{len(self.recorder)} passos gravados em {self.recorder.path}")
+                self.recorder = None
+        except Exception as e:
+            print(f"Erro na gravação da trajetória: {str(e)}")
+            self.recorder = None
+        
+    def update_overlay(self):
+        """Mostra as estatísticas por etapa sobre o gráfico"""
+        text = ("Física/controle\n" + self.tick_profiler.summary()
+                + "\n\nDesenho\n" + self.render_profiler.summary())
+        systems = cache_stats()['systems']
+        text += (f"\n\nCache de sistemas fuzzy: {systems['hits']} acertos, {systems['misses']} faltas, "
+                 f"{systems['evictions']} descartes")
+        if self.tick_profiler.profiling:
+            text += "\n\nGravando perfil..."
+        self.overlay_label.setText(text)
+        self.overlay_label.adjustSize()
+        
+    def update_plot(self):
+        """Atualiza o gráfico do pêndulo"""
+        self.render_profiler.start_tick()
+        x = self.simulation.cart_position
+        y = 0
+        pendulum_x = x + self.simulation.length * np.sin(self.simulation.angle)
+        pendulum_y = -self.simulation.length * np.cos(self.simulation.angle)
+        
+        self.cart_line.set_data([x-0.5, x+0.5], [y, y])
+        self.pendulum_line.set_data([x, pendulum_x], [y, pendulum_y])
+        
+        if self.background is None:
+            # Primeiro quadro: o draw_event guarda o fundo e desenha o pêndulo
+            self.canvas.draw()
+        else:
+            self.draw_pendulum()
+        self.render_profiler.mark('render')
+        self.render_profiler.end_tick()
+        
+        # FPS medido a cada segundo
+        self.frame_count += 1
+        now = time.perf_counter()
+        if now - self.fps_time >= 1.0:
+            self.fps_label.setText(f"FPS: {self.frame_count / (now - self.fps_time):.1f} | "
+                                   f"Tempo simulado: {self.sim_time:.1f} s")
+            self.frame_count = 0
+            self.fps_time = now
+            if self.instrumentation_check.isChecked():
+                self.update_overlay()
@@ -0,0 +1,54 @@
+"""
+Medição do tempo de inicialização da aplicação.
+
+Os módulos pesados são importados por STARTUP_TIMER.import_module, que mede
+cada importação; as etapas restantes (criação da janela, etc) são marcadas com
+STARTUP_TIMER.mark. `python main.py --startup-report` imprime o relatório.
+"""
+import importlib
+import sys
+import time
+
+
+class StartupTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.entries = []  # (descrição, duração em segundos)
+        self.verbose = False
+        self._last_mark = self.start
+
+    def import_module(self, name):
+        """
+        Importa um módulo medindo o tempo gasto. Um módulo já carregado (por
+        exemplo, como dependência de outro) custa praticamente zero.
+        """
+        already_loaded = name in sys.modules
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        elapsed = time.perf_counter() - start
+        if not already_loaded:
+            self.entries.append((f"import {name}", elapsed))
+            if self.verbose:
+                print(f"[inicialização] import {name}: {elapsed * 1000:.1f} ms")
+            # A etapa em andamento (marcada depois por mark) não inclui esta importação
+            self._last_mark += elapsed
+        return module
+
+    def mark(self, label):
+        """Registra como etapa o tempo desde a marca anterior, sem as importações medidas no meio"""
+        now = time.perf_counter()
+        self.entries.append((label, now - self._last_mark))
+        self._last_mark = now
+
+    def report(self):
+        """Texto com a duração de cada etapa e o total desde a criação do medidor"""
+        total = time.perf_counter() - self.start
+        lines = ["Tempo de inicialização:"]
+        for label, elapsed in self.entries:
+            lines.append(f"  {label:<50} {elapsed * 1000:9.1f} ms")
+        lines.append(f"  {'total':<50} {total * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+
+# Medidor compartilhado pela aplicação (criado na primeira importação deste módulo)
+STARTUP_TIMER = StartupTimer()
@@ -0,0 +1,3 @@
+"""
+Execução da simulação e dos controladores sem interface gráfica.
+"""
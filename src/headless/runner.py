@@ -0,0 +1,317 @@
+"""
+Executor em lote, sem interface gráfica.
+
+Monta o PendulumSimulation e um dos controladores a partir de uma configuração
+JSON, simula os episódios o mais rápido possível e grava as métricas
+(metrics.json) e as trajetórias (trajectories.npz ou, com stream_trajectories,
+um diretório por episódio gravado passo a passo) no diretório de saída.
+Não importa PyQt5 nem matplotlib; o controlador escolhido é importado apenas
+quando necessário (torch só para o Neuro-Fuzzy).
+
+Uso:
+    python -m src.headless --config config.json --episodes 10 --output resultados
+"""
+import argparse
+import copy
+import json
+import os
+import time
+
+import numpy as np
+
+from src.simulation.instrumentation import TickProfiler
+from src.simulation.pendulum_sim import PendulumSimulation
+from src.simulation.recorder import TrajectoryRecorder
+
+# Configuração padrão; um arquivo de configuração só precisa informar o que muda
+DEFAULT_CONFIG = {
+    'controller': {
+        'type': 'FIS',           # 'FIS', 'Neuro-Fuzzy', 'Neuro-Fuzzy-NumPy' ou 'Genetic-Fuzzy'
+        'params': {},            # Argumentos do construtor do controlador
+        'generations': 0,        # Genetic-Fuzzy: gerações evoluídas antes dos episódios
+    },
+    'simulation': {
+        'mass': 1.0,
+        'length': 1.0,
+        'cart_mass': 1.0,
+        'gravity': 9.81,
+        'dt': 0.01,
+        'inertia': None,
+        'integrator': 'euler',
+        'substeps': 1,
+    },
+    'episodes': 1,
+    'steps': 1000,
+    # Estado inicial de cada episódio: valor nominal + ruído uniforme em ±initial_noise
+    'initial_state': {'angle': 0.1, 'angular_velocity': 0.0, 'cart_position': 0.0, 'cart_velocity': 0.0},
+    'initial_noise': {'angle': 0.0, 'angular_velocity': 0.0, 'cart_position': 0.0, 'cart_velocity': 0.0},
+    'fall_angle': np.pi / 4,     # |ângulo| acima do qual o pêndulo é considerado caído
+    'stop_on_fall': False,       # Encerra o episódio quando o pêndulo cai
+    'seed': None,
+    'output': 'headless_output',
+    'save_trajectories': True,
+    # Grava cada episódio passo a passo em trajectories/episode_NNNN/ (memória
+    # limitada, para episódios longos) em vez de trajectories.npz ao final
+    'stream_trajectories': False,
+    'instrument': False,         # Mede o tempo do controlador e da física a cada passo
+    'profile_ticks': 0,          # Grava um perfil por amostragem dos primeiros N passos
+}
+
+# Colunas das trajetórias gravadas
+TRAJECTORY_COLUMNS = ('time', 'cart_position', 'cart_velocity', 'angle', 'angular_velocity', 'force')
+
+
+def merge_config(base, overrides):
+    """Mescla recursivamente `overrides` sobre uma cópia de `base`"""
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_config(path=None, overrides=None):
+    """Carrega a configuração de um arquivo JSON (opcional) sobre DEFAULT_CONFIG"""
+    config = DEFAULT_CONFIG
+    if path is not None:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = merge_config(config, json.load(f))
+    return merge_config(config, overrides or {})
+
+
+def build_simulation(config):
+    """Cria o PendulumSimulation com os parâmetros de config['simulation']"""
+    return PendulumSimulation(**config['simulation'])
+
+
+def build_controller(config, rng):
+    """
+    Cria o controlador de config['controller']. Os módulos dos controladores
+    são importados aqui para que apenas as dependências do escolhido sejam
+    carregadas.
+    """
+    controller_config = config['controller']
+    controller_type = controller_config['type']
+    params = dict(controller_config.get('params', {}))
+
+    if controller_type == 'FIS':
+        from src.controllers.fis_controller import FISController
+        # Ganho e limites fuzzy vão para update_parameters, o resto para o construtor
+        tuning = {key: params.pop(key) for key in ('gain', 'angle_range', 'velocity_range', 'force_range')
+                  if key in params}
+        controller = FISController(**params)
+        if tuning:
+            controller.update_parameters(**tuning)
+        return controller
+
+    if controller_type == 'Neuro-Fuzzy':
+        from src.controllers.neuro_fuzzy import NeuroFuzzyController
+        return NeuroFuzzyController(**params)
+
+    if controller_type == 'Neuro-Fuzzy-NumPy':
+        # Modelo exportado com export_parameters; não precisa do PyTorch
+        from src.controllers.neuro_fuzzy_numpy import NeuroFuzzyInference
+        return NeuroFuzzyInference.load(params['path'])
+
+    if controller_type == 'Genetic-Fuzzy':
+        from src.controllers.genetic_fuzzy import GeneticFuzzyController
+        # No modo 'rollout', o fitness usa a mesma planta dos episódios
+        if params.get('fitness_mode') == 'rollout':
+            params['rollout_params'] = {**config['simulation'], **params.get('rollout_params', {})}
+        controller = GeneticFuzzyController(**params)
+        generations = controller_config.get('generations', 0)
+        for generation in range(generations):
+            fitness_scores = controller.evolve(evolution_cases(controller, config, rng))
+            print(f"Geração {generation + 1}/{generations}: melhor {np.max(fitness_scores):.4f}, "
+                  f"média {np.mean(fitness_scores):.4f}")
+        return controller
+
+    raise ValueError(f"Controlador desconhecido: {controller_type}")
+
+
+def evolution_cases(controller, config, rng):
+    """Casos de teste (ou condições iniciais, no modo 'rollout') de uma geração"""
+    if controller.fitness_mode == 'rollout':
+        return np.array([initial_state(config, rng)[:2] for _ in range(10)])
+
+    # Mesmos casos de teste da interface gráfica
+    angles = rng.uniform(-np.pi/2, np.pi/2, 100)
+    velocities = rng.uniform(-5, 5, 100)
+    return np.column_stack([angles, velocities, -2 * angles - 1 * velocities])
+
+
+def initial_state(config, rng):
+    """Sorteia (ângulo, velocidade angular, posição do carrinho, velocidade do carrinho)"""
+    keys = ('angle', 'angular_velocity', 'cart_position', 'cart_velocity')
+    nominal = np.array([config['initial_state'][key] for key in keys], dtype=float)
+    noise = np.array([config['initial_noise'][key] for key in keys], dtype=float)
+    return nominal + rng.uniform(-1, 1, 4) * noise
+
+
+def run_episode(simulation, controller, state, steps, fall_angle, stop_on_fall=False, profiler=None,
+                recorder=None):
+    """
+    Simula um episódio a partir de `state`. Com um TickProfiler ligado, as
+    métricas incluem o tempo por etapa ('controller' e 'physics') de cada passo.
+    Com um TrajectoryRecorder, cada passo é gravado nele (com o tempo de
+    relógio do passo) em vez de em um array com o episódio inteiro.
+
+    Returns:
+        tuple: (trajetória (passos, len(TRAJECTORY_COLUMNS)) ou, com recorder,
+            a gravação (um array por coluna), dicionário de métricas)
+    """
+    simulation.reset()
+    simulation.angle, simulation.angular_velocity, simulation.cart_position, simulation.cart_velocity = \
+        (float(value) for value in state)
+    dt = simulation.dt
+    trajectory = np.empty((steps, len(TRAJECTORY_COLUMNS))) if recorder is None else None
+    fall_step = None
+
+    profiler = profiler if profiler is not None else TickProfiler(('controller', 'physics'))
+    profiler.reset()
+    start = time.perf_counter()
+    step = 0
+    clock = time.perf_counter
+    while step < steps:
+        step_start = clock()
+        profiler.start_tick()
+        force = float(np.clip(controller.compute_control(simulation.angle, simulation.angular_velocity), -20, 20))
+        profiler.mark('controller')
+        simulation.update(force)
+        profiler.mark('physics')
+        profiler.end_tick()
+        if recorder is None:
+            trajectory[step] = ((step + 1) * dt, simulation.cart_position, simulation.cart_velocity,
+                                simulation.angle, simulation.angular_velocity, force)
+        else:
+            recorder.record((step + 1) * dt, simulation.cart_position, simulation.cart_velocity,
+                            simulation.angle, simulation.angular_velocity, force, clock() - step_start)
+        step += 1
+        if fall_step is None and abs(simulation.angle) > fall_angle:
+            fall_step = step
+            if stop_on_fall:
+                break
+    elapsed = time.perf_counter() - start
+    if recorder is None:
+        trajectory = trajectory[:step]
+        columns = dict(zip(TRAJECTORY_COLUMNS, trajectory.T))
+    else:
+        trajectory = columns = recorder.data()
+
+    t, position, angle, force = columns['time'], columns['cart_position'], columns['angle'], columns['force']
+    metrics = {
+        'steps': step,
+        'fell': fall_step is not None,
+        'time_upright': (step if fall_step is None else fall_step - 1) * dt,
+        'angle_itae': float(np.sum(t * np.abs(angle)) * dt),
+        'cart_itae': float(np.sum(t * np.abs(position)) * dt),
+        'effort': float(np.sum(force ** 2) * dt),
+        'max_abs_angle': float(np.max(np.abs(angle))),
+        'final_state': [float(columns[key][-1]) for key in TRAJECTORY_COLUMNS[1:5]],
+        'wall_time': elapsed,
+        'steps_per_second': step / elapsed if elapsed > 0 else float('inf'),
+    }
+    if profiler.count:
+        stats = profiler.stats()
+        metrics['stage_timings'] = {name: stats[name] for name in profiler.stages + ('total',)}
+    return trajectory, metrics
+
+
+def summarize(episodes):
+    """Média e desvio das métricas numéricas dos episódios"""
+    summary = {'episodes': len(episodes), 'fall_rate': float(np.mean([m['fell'] for m in episodes]))}
+    for key in ('time_upright', 'angle_itae', 'cart_itae', 'effort', 'max_abs_angle', 'steps_per_second'):
+        values = np.array([m[key] for m in episodes], dtype=float)
+        summary[key] = {'mean': float(values.mean()), 'std': float(values.std())}
+    return summary
+
+
+def run(config):
+    """
+    Executa todos os episódios e grava os resultados.
+
+    Returns:
+        dict: Métricas de cada episódio e o resumo
+    """
+    rng = np.random.default_rng(config['seed'])
+    simulation = build_simulation(config)
+    controller = build_controller(config, rng)
+
+    output = config['output']
+    os.makedirs(output, exist_ok=True)
+
+    # O buffer cobre um episódio inteiro, para as estatísticas por episódio
+    profiler = TickProfiler(('controller', 'physics'), capacity=max(config['steps'], 1),
+                            enabled=config['instrument'])
+    if config['profile_ticks']:
+        profiler.profile_ticks(config['profile_ticks'], os.path.join(output, 'profile.txt'))
+
+    stream = config['save_trajectories'] and config['stream_trajectories']
+    if stream:
+        os.makedirs(os.path.join(output, 'trajectories'), exist_ok=True)
+
+    episodes = []
+    trajectories = {}
+    for episode in range(config['episodes']):
+        state = initial_state(config, rng)
+        recorder = None
+        if stream:
+            recorder = TrajectoryRecorder(os.path.join(output, 'trajectories', f'episode_{episode:04d}'))
+        try:
+            trajectory, metrics = run_episode(simulation, controller, state, config['steps'],
+                                              config['fall_angle'], config['stop_on_fall'], profiler, recorder)
+        finally:
+            if recorder is not None:
+                recorder.close()
+        metrics['initial_state'] = state.tolist()
+        episodes.append(metrics)
+        if not stream:
+            trajectories[f'episode_{episode:04d}'] = trajectory
+        print(f"Episódio {episode + 1}/{config['episodes']}: {metrics['steps']} passos, "
+              f"em pé por {metrics['time_upright']:.2f} s, ITAE do ângulo {metrics['angle_itae']:.4f}, "
+              f"{metrics['steps_per_second']:.0f} passos/s")
+
+    results = {'config': config, 'episodes': episodes, 'summary': summarize(episodes)}
+
+    with open(os.path.join(output, 'metrics.json'), 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    if config['save_trajectories'] and not stream:
+        np.savez_compressed(os.path.join(output, 'trajectories.npz'),
+                            columns=np.array(TRAJECTORY_COLUMNS), **trajectories)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simula o pêndulo invertido sem interface gráfica")
+    parser.add_argument('--config', help="Arquivo JSON de configuração (ver DEFAULT_CONFIG)")
+    parser.add_argument('--controller', choices=['FIS', 'Neuro-Fuzzy', 'Neuro-Fuzzy-NumPy', 'Genetic-Fuzzy'],
+                        help="Controlador (sobrepõe a configuração)")
+    parser.add_argument('--episodes', type=int, help="Número de episódios")
+    parser.add_argument('--steps', type=int, help="Passos por episódio")
+    parser.add_argument('--seed', type=int, help="Semente dos estados iniciais")
+    parser.add_argument('--output', help="Diretório de saída")
+    parser.add_argument('--stream-trajectories', action='store_true',
+                        help="Grava as trajetórias passo a passo, um .npy por coluna (episódios longos)")
+    parser.add_argument('--instrument', action='store_true', help="Mede o tempo do controlador e da física")
+    parser.add_argument('--profile-ticks', type=int,
+                        help="Grava em profile.txt um perfil por amostragem dos primeiros N passos")
+    args = parser.parse_args(argv)
+
+    overrides = {key: value for key, value in
+                 (('episodes', args.episodes), ('steps', args.steps), ('seed', args.seed), ('output', args.output),
+                  ('profile_ticks', args.profile_ticks))
+                 if value is not None}
+    if args.instrument:
+        overrides['instrument'] = True
+    if args.stream_trajectories:
+        overrides['stream_trajectories'] = True
+    if args.controller is not None:
+        overrides['controller'] = {'type': args.controller}
+
+    results = run(load_config(args.config, overrides))
+    summary = results['summary']
+    print(f"Taxa de quedas: {summary['fall_rate']:.2%}; tempo em pé médio: "
+          f"{summary['time_upright']['mean']:.2f} s; resultados em {results['config']['output']}")
@@ -0,0 +1,141 @@
+import numpy as np
+
+from src.simulation.integrators import INTEGRATORS, rk4_step, rk45_integrate
+from src.simulation.pendulum_sim import cartpole_derivatives, compute_accelerations
+
+class BatchPendulumSimulation:
+    """
+    Simula N pêndulos invertidos independentes de uma só vez.
+
+    O estado fica em um único array contíguo (4, N) e cada passo aplica as
+    mesmas equações de movimento e regras de saturação de PendulumSimulation,
+    de forma vetorizada. Cada parâmetro físico pode ser um escalar (comum a
+    todos os pêndulos) ou um array com um valor por pêndulo.
+    """
+
+    # Linhas do array de estado
+    CART_POSITION, CART_VELOCITY, ANGLE, ANGULAR_VELOCITY = range(4)
+
+    def __init__(self, num_envs, mass=1.0, length=1.0, cart_mass=1.0, gravity=9.81, dt=0.01, inertia=None,
+                 integrator='euler', substeps=1, rtol=1e-6, atol=1e-8):
+        self.num_envs = num_envs
+        self.dt = dt
+
+        # Integração (mesmas opções de PendulumSimulation)
+        if integrator not in INTEGRATORS:
+            raise ValueError(f"Integrador desconhecido: {integrator}")
+        self.integrator = integrator
+        self.substeps = substeps
+        self.rtol = rtol
+        self.atol = atol
+        self._rk45_step = None
+        self.set_parameters(mass=mass, length=length, cart_mass=cart_mass, gravity=gravity, inertia=inertia)
+
+        # Estado: posição e velocidade do carrinho, ângulo e velocidade angular
+        self.state = np.zeros((4, num_envs))
+        self.cart_position = self.state[self.CART_POSITION]
+        self.cart_velocity = self.state[self.CART_VELOCITY]
+        self.angle = self.state[self.ANGLE]
+        self.angular_velocity = self.state[self.ANGULAR_VELOCITY]
+
+        # Buffers reutilizados a cada passo (evitam alocação por passo)
+        self._force = np.zeros(num_envs)
+
+        self.reset()
+
+    def _per_env(self, value):
+        """Converte um parâmetro escalar ou por pêndulo em um array (N,)"""
+        return np.ascontiguousarray(np.broadcast_to(np.asarray(value, dtype=float), (self.num_envs,)))
+
+    def set_parameters(self, mass=None, length=None, cart_mass=None, gravity=None, inertia=None):
+        """
+        Atualiza os parâmetros físicos. Se a inércia não for informada, ela é
+        recalculada como m_p * l^2 para cada pêndulo.
+        """
+        if mass is not None:
+            self.mass = self._per_env(mass)
+        if length is not None:
+            self.length = self._per_env(length)
+        if cart_mass is not None:
+            self.cart_mass = self._per_env(cart_mass)
+        if gravity is not None:
+            self.gravity = self._per_env(gravity)
+        if inertia is not None:
+            self.inertia = self._per_env(inertia)
+        else:
+            self.inertia = self.mass * self.length ** 2
+
+    def reset(self, angle=0.1, angular_velocity=0.0, cart_position=0.0, cart_velocity=0.0):
+        """
+        Reseta o estado de todos os pêndulos. Cada valor pode ser um escalar
+        ou um array (N,) de condições iniciais.
+        """
+        self.cart_position[:] = cart_position
+        self.cart_velocity[:] = cart_velocity
+        self.angle[:] = angle
+        self.angular_velocity[:] = angular_velocity
+
+    def update(self, forces, active=None):
+        """
+        Avança os pêndulos um passo de tempo.
+
+        Args:
+            forces (np.ndarray): Força aplicada a cada carrinho (N,) ou escalar
+            active (np.ndarray): Índices dos pêndulos a avançar (os demais
+                ficam parados no estado atual); None avança todos
+
+        Returns:
+            np.ndarray: O array de estado (4, N), atualizado no lugar
+        """
+        force = np.clip(np.broadcast_to(forces, (self.num_envs,)), -20, 20, out=self._force)
+        if active is None:
+            self._advance(self.state, force, self.mass, self.cart_mass, self.length, self.gravity, self.inertia)
+        else:
+            state = self.state[:, active]
+            self._advance(state, force[active], self.mass[active], self.cart_mass[active],
+                          self.length[active], self.gravity[active], self.inertia[active])
+            self.state[:, active] = state
+        return self.state
+
+    def _advance(self, state, force, mass, cart_mass, length, gravity, inertia):
+        """Integra `state` (4, M), no lugar, por dt com os parâmetros dos M pêndulos"""
+        h = self.dt / self.substeps
+        for _ in range(self.substeps):
+            if self.integrator == 'euler':
+                self._euler_step(state, force, mass, cart_mass, length, gravity, inertia, h)
+            else:
+                self._runge_kutta_step(state, force, mass, cart_mass, length, gravity, inertia, h)
+
+    def _euler_step(self, state, force, mass, cart_mass, length, gravity, inertia, h):
+        """Um passo de Euler semi-implícito, no lugar"""
+        cart_position, cart_velocity, angle, angular_velocity = state
+        theta_ddot, x_ddot = compute_accelerations(
+            angle, angular_velocity, force, mass, cart_mass, length, gravity, inertia
+        )
+
+        # Mesma ordem de atualização e saturação do simulador escalar
+        cart_velocity += x_ddot * h
+        np.clip(cart_velocity, -10, 10, out=cart_velocity)
+        cart_position += cart_velocity * h
+        np.clip(cart_position, -10, 10, out=cart_position)
+
+        angular_velocity += theta_ddot * h
+        np.clip(angular_velocity, -10, 10, out=angular_velocity)
+        angle += angular_velocity * h
+
+    def _runge_kutta_step(self, state, force, mass, cart_mass, length, gravity, inertia, h):
+        """Um passo de RK4 ou um intervalo h integrado pelo RK45 adaptativo, no lugar"""
+        def derivatives(current):
+            return cartpole_derivatives(current, force, mass, cart_mass, length, gravity, inertia)
+
+        if self.integrator == 'rk4':
+            new_state = rk4_step(derivatives, state, h)
+        else:
+            new_state, self._rk45_step, _ = rk45_integrate(derivatives, state, h, self._rk45_step,
+                                                           self.rtol, self.atol)
+
+        # Copia para o array de estado (mantém as views) e aplica as saturações
+        state[:] = new_state
+        np.clip(state[self.CART_VELOCITY], -10, 10, out=state[self.CART_VELOCITY])
+        np.clip(state[self.CART_POSITION], -10, 10, out=state[self.CART_POSITION])
+        np.clip(state[self.ANGULAR_VELOCITY], -10, 10, out=state[self.ANGULAR_VELOCITY])
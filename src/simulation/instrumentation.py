@@ -0,0 +1,216 @@
+"""
+Instrumentação do laço de simulação.
+
+TickProfiler guarda, em um buffer circular, o tempo gasto em cada etapa
+(controlador, física, desenho, ...) de cada iteração do laço e calcula
+estatísticas sobre as últimas iterações. Desativado, cada chamada custa apenas
+uma verificação de atributo.
+
+SamplingProfiler amostra periodicamente a pilha da thread do laço a partir de
+outra thread e grava as pilhas agregadas no formato "collapsed" (uma linha
+`função;função;função contagem` por pilha), aceito pelas ferramentas de
+flame graph. TickProfiler.profile_ticks liga o amostrador por um número
+escolhido de iterações.
+"""
+import collections
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+class TickProfiler:
+    def __init__(self, stages, capacity=1000, enabled=False):
+        """
+        Args:
+            stages (tuple): Nomes das etapas medidas em cada iteração
+            capacity (int): Número de iterações mantidas no buffer
+            enabled (bool): Se a medição começa ligada
+        """
+        self.stages = tuple(stages)
+        self.stage_index = {stage: i for i, stage in enumerate(self.stages)}
+        self.capacity = capacity
+        self.enabled = enabled
+
+        # Buffer circular (iterações x etapas) e duração total de cada iteração
+        self.durations = np.zeros((capacity, len(self.stages)))
+        self.tick_durations = np.zeros(capacity)
+        self.tick_times = np.zeros(capacity)
+        self.count = 0
+        self._current = np.zeros(len(self.stages))
+        self._tick_start = 0.0
+        self._last = 0.0
+        self._in_tick = False
+
+        # Perfil por amostragem de uma janela de iterações
+        self._sampler = None
+        self._profile_ticks = 0
+        self._profile_path = None
+        self._enabled_before_profile = enabled
+        self.last_profile = None
+
+    def start_tick(self):
+        """Marca o início de uma iteração"""
+        if not self.enabled:
+            return
+        if self._profile_ticks and self._sampler is None:
+            # Só amostra dentro das iterações (fora delas a thread está ociosa)
+            self._sampler = SamplingProfiler(active=lambda: self._in_tick)
+            self._sampler.start()
+        self._in_tick = True
+        self._tick_start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        """Atribui à etapa `stage` o tempo desde a marca anterior da iteração"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._current[self.stage_index[stage]] += now - self._last
+        self._last = now
+
+    def end_tick(self):
+        """Fecha a iteração e grava as durações das etapas no buffer"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._in_tick = False
+        row = self.count % self.capacity
+        self.durations[row] = self._current
+        self.tick_durations[row] = now - self._tick_start
+        self.tick_times[row] = now
+        self._current[:] = 0.0
+        self.count += 1
+
+        if self._sampler is not None:
+            self._profile_ticks -= 1
+            if self._profile_ticks <= 0:
+                self._finish_profile()
+
+    def reset(self):
+        """Descarta as iterações gravadas"""
+        self.count = 0
+        self._current[:] = 0.0
+
+    def stats(self, window=None):
+        """
+        Estatísticas das últimas `window` iterações (padrão: todo o buffer).
+
+        Returns:
+            dict: Por etapa (e 'total'), média, p95 e máximo em milissegundos;
+                'ticks' e 'rate' (iterações por segundo no intervalo)
+        """
+        available = min(self.count, self.capacity)
+        window = available if window is None else min(window, available)
+        if window == 0:
+            return {'ticks': 0, 'rate': 0.0}
+
+        rows = (self.count - 1 - np.arange(window)) % self.capacity
+        result = {'ticks': window}
+        columns = [(stage, self.durations[rows, i]) for i, stage in enumerate(self.stages)]
+        columns.append(('total', self.tick_durations[rows]))
+        for name, values in columns:
+            result[name] = {'mean_ms': float(values.mean() * 1e3),
+                            'p95_ms': float(np.percentile(values, 95) * 1e3),
+                            'max_ms': float(values.max() * 1e3)}
+
+        elapsed = self.tick_times[rows[0]] - self.tick_times[rows[-1]]
+        result['rate'] = float((window - 1) / elapsed) if elapsed > 0 else 0.0
+        return result
+
+    def summary(self, window=None):
+        """Texto curto com as estatísticas, uma etapa por linha"""
+        stats = self.stats(window)
+        if stats['ticks'] == 0:
+            return "sem iterações medidas"
+        lines = [f"{stats['rate']:.0f} iterações/s"]
+        for name in self.stages + ('total',):
+            s = stats[name]
+            lines.append(f"{name}: {s['mean_ms']:.2f} ms (p95 {s['p95_ms']:.2f}, máx {s['max_ms']:.2f})")
+        return "\n".join(lines)
+
+    def profile_ticks(self, ticks, path):
+        """
+        Grava um perfil por amostragem das próximas `ticks` iterações em `path`
+        (liga a medição durante o perfil, se estiver desligada)
+        """
+        if not self.profiling:
+            self._enabled_before_profile = self.enabled
+        self.enabled = True
+        self._profile_ticks = ticks
+        self._profile_path = path
+
+    @property
+    def profiling(self):
+        return self._profile_ticks > 0
+
+    def _finish_profile(self):
+        self._sampler.stop()
+        self._sampler.dump(self._profile_path)
+        self.last_profile = self._profile_path
+        print(f"Perfil de {self._sampler.samples} amostras gravado em {self._profile_path}")
+        self._sampler = None
+        self._profile_ticks = 0
+        self.enabled = self._enabled_before_profile
+
+
+class SamplingProfiler:
+    """
+    Amostrador de pilha: uma thread auxiliar registra a pilha da thread que
+    chamou start() a cada `interval` segundos (apenas quando `active()`, se
+    informado, for verdadeiro).
+
+    Durante a amostragem, o intervalo de troca de threads do interpretador é
+    reduzido para `interval`; caso contrário a thread amostrada só liberaria o
+    GIL a cada 5 ms e as amostras se concentrariam nesses pontos.
+    """
+
+    def __init__(self, interval=0.0005, active=None):
+        self.interval = interval
+        self.active = active
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._thread_id = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._switch_interval = None
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(self.interval)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.active is not None and not self.active():
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def top_functions(self, limit=20):
+        """Funções mais frequentes no topo da pilha: lista de (função, fração das amostras)"""
+        leaves = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return [(name, count / max(self.samples, 1)) for name, count in leaves.most_common(limit)]
+
+    def dump(self, path):
+        """Grava as pilhas no formato collapsed (uma pilha e a sua contagem por linha)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
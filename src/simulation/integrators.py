@@ -0,0 +1,99 @@
+"""
+Integradores numéricos para as equações de movimento do pêndulo.
+
+As funções recebem `derivatives(state) -> d(state)/dt` e um estado como array
+NumPy de formato (4,) ou (4, N), de modo que servem tanto para o simulador
+escalar quanto para o simulador em lote.
+"""
+import numpy as np
+
+# Métodos disponíveis em PendulumSimulation/BatchPendulumSimulation
+INTEGRATORS = ('euler', 'rk4', 'rk45')
+
+# Coeficientes de Dormand-Prince (RK45)
+_DP_C = (0.0, 1/5, 3/10, 4/5, 8/9, 1.0, 1.0)
+_DP_A = (
+    (),
+    (1/5,),
+    (3/40, 9/40),
+    (44/45, -56/15, 32/9),
+    (19372/6561, -25360/2187, 64448/6561, -212/729),
+    (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+    (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84),
+)
+_DP_B = (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84, 0.0)
+_DP_E = (71/57600, 0.0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40)
+
+
+def rk4_step(derivatives, state, h):
+    """Um passo do Runge-Kutta clássico de quarta ordem"""
+    k1 = derivatives(state)
+    k2 = derivatives(state + 0.5 * h * k1)
+    k3 = derivatives(state + 0.5 * h * k2)
+    k4 = derivatives(state + h * k3)
+    return state + (h / 6.0) * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+def rk45_integrate(derivatives, state, duration, h=None, rtol=1e-6, atol=1e-8, max_steps=10000):
+    """
+    Integra por `duration` segundos com Dormand-Prince (RK45) e passo adaptativo.
+
+    No modo em lote, o erro usado no controle de passo é o maior entre todos os
+    pêndulos, de modo que todos avançam com o mesmo passo.
+
+    Args:
+        derivatives (callable): Função state -> d(state)/dt
+        state (np.ndarray): Estado inicial (4,) ou (4, N)
+        duration (float): Intervalo de tempo a integrar
+        h (float): Passo inicial sugerido (por exemplo, o último passo aceito)
+        rtol (float): Tolerância relativa
+        atol (float): Tolerância absoluta
+        max_steps (int): Limite de passos (aceitos ou rejeitados)
+
+    Returns:
+        tuple: (novo estado, passo sugerido para a próxima chamada, número de avaliações de derivadas).
+            O passo sugerido é o do controle de erro, não o último passo
+            encurtado para terminar exatamente em `duration`.
+    """
+    t = 0.0
+    suggested = duration if h is None else h
+    evaluations = 0
+    steps = 0
+    k_first = None
+
+    while duration - t > 1e-12 * duration:
+        if steps >= max_steps:
+            raise RuntimeError("RK45: número máximo de passos atingido")
+        steps += 1
+        h = min(suggested, duration - t)
+
+        # Estágios (FSAL: a última derivada de um passo aceito é a primeira do próximo)
+        k = [derivatives(state) if k_first is None else k_first]
+        evaluations += 1 if k_first is None else 0
+        for stage in range(1, 7):
+            increment = sum(a * k_i for a, k_i in zip(_DP_A[stage], k))
+            k.append(derivatives(state + h * increment))
+            evaluations += 1
+
+        new_state = state + h * sum(b * k_i for b, k_i in zip(_DP_B, k) if b != 0.0)
+        error = h * sum(e * k_i for e, k_i in zip(_DP_E, k) if e != 0.0)
+        scale = atol + rtol * np.maximum(np.abs(state), np.abs(new_state))
+        error_norm = float(np.sqrt(np.max(np.mean((error / scale) ** 2, axis=0))))
+
+        if error_norm <= 1.0:
+            t += h
+            state = new_state
+            k_first = k[-1]
+        else:
+            k_first = k[0]
+
+        # Ajuste do passo com fator de segurança e limites de variação. Um
+        # passo aceito que foi encurtado para caber no intervalo não reduz a
+        # sugestão: o passo menor veio do fim do intervalo, não do erro
+        factor = 5.0 if error_norm == 0 else min(5.0, max(0.2, 0.9 * error_norm ** -0.2))
+        if error_norm <= 1.0 and h < suggested:
+            suggested = max(suggested, h * factor)
+        else:
+            suggested = h * factor
+
+    return state, suggested, evaluations
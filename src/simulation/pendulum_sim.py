@@ -1,7 +1,52 @@
 import numpy as np
 
+from src.simulation.integrators import INTEGRATORS, rk4_step, rk45_integrate
+
+def compute_accelerations(theta, theta_dot, force, m_p, m_c, l, g, I):
+    """
+    Resolve as equações de movimento completas do pêndulo sobre o carrinho.
+
+    Funciona tanto com escalares quanto com arrays NumPy (um valor por pêndulo).
+
+    Returns:
+        tuple: (theta_ddot, x_ddot)
+    """
+    # Sistema de equações:
+    # 1) x_ddot = (m_p * l * (theta_dot**2 * sin(theta) - theta_ddot * cos(theta)) + F) / (m_c + m_p)
+    # 2) theta_ddot = (m_p * l * (g * sin(theta) - x_ddot * cos(theta))) / (I + m_p * l**2)
+
+    # Resolvendo o sistema:
+    # Primeiro, expressa x_ddot em função de theta_ddot
+    # x_ddot = (m_p * l * (theta_dot**2 * sin(theta) - theta_ddot * cos(theta)) + force) / (m_c + m_p)
+    # Substitui x_ddot na equação de theta_ddot e resolve para theta_ddot
+    sin_theta = np.sin(theta)
+    cos_theta = np.cos(theta)
+
+    denom = (I + m_p * l**2) * (m_c + m_p) - (m_p**2) * (l**2) * (cos_theta**2)
+
+    # Numerador de theta_ddot
+    num_theta_ddot = (m_p * l * (g * sin_theta) * (m_c + m_p)
+                      + m_p * l * (cos_theta) * (force)
+                      - m_p**2 * l**2 * theta_dot**2 * sin_theta * cos_theta)
+    theta_ddot = num_theta_ddot / denom
+
+    # Agora x_ddot
+    num_x_ddot = (m_p * l * (theta_dot**2 * sin_theta - theta_ddot * cos_theta) + force)
+    x_ddot = num_x_ddot / (m_c + m_p)
+
+    return theta_ddot, x_ddot
+
+def cartpole_derivatives(state, force, m_p, m_c, l, g, I):
+    """
+    Derivada temporal do estado [x, x_dot, theta, theta_dot], no formato (4,)
+    ou (4, N), usada pelos integradores de Runge-Kutta.
+    """
+    theta_ddot, x_ddot = compute_accelerations(state[2], state[3], force, m_p, m_c, l, g, I)
+    return np.stack((state[1], x_ddot, state[3], theta_ddot))
+
 class PendulumSimulation:
-    def __init__(self, mass=1.0, length=1.0, cart_mass=1.0, gravity=9.81, dt=0.01, inertia=None):
+    def __init__(self, mass=1.0, length=1.0, cart_mass=1.0, gravity=9.81, dt=0.01, inertia=None,
+                 integrator='euler', substeps=1, rtol=1e-6, atol=1e-8):
         self.mass = mass  # massa do pêndulo (m_p)
         self.length = length  # comprimento do pêndulo (l)
         self.cart_mass = cart_mass  # massa do carrinho (m_c)
@@ -9,6 +54,16 @@ class PendulumSimulation:
         self.dt = dt
         self.inertia = inertia if inertia is not None else self.mass * self.length ** 2  # I
         
+        # Integração: o controlador é avaliado uma vez por dt (período de controle)
+        # e a física avança em `substeps` subpassos com a força mantida constante
+        if integrator not in INTEGRATORS:
+            raise ValueError(f"Integrador desconhecido: {integrator}")
+        self.integrator = integrator
+        self.substeps = substeps
+        self.rtol = rtol  # tolerâncias do RK45 adaptativo
+        self.atol = atol
+        self._rk45_step = None  # último passo sugerido pelo RK45
+        
         # Estado inicial
         self.angle = 0.1  # ângulo em radianos (0 = para cima)
         self.angular_velocity = 0.0  # velocidade angular
@@ -17,51 +72,19 @@ class PendulumSimulation:
         
     def update(self, force):
         """
-        Atualiza o estado do pêndulo usando as equações de movimento completas
+        Atualiza o estado do pêndulo usando as equações de movimento completas,
+        avançando dt com o integrador e o número de subpassos configurados
         """
         try:
             # Limita a força aplicada
             force = np.clip(force, -20, 20)
 
-            m_p = self.mass
-            m_c = self.cart_mass
-            l = self.length
-            g = self.gravity
-            I = self.inertia
-            theta = self.angle
-            theta_dot = self.angular_velocity
-            x_dot = self.cart_velocity
-
-            # Sistema de equações:
-            # 1) x_ddot = (m_p * l * (theta_dot**2 * sin(theta) - theta_ddot * cos(theta)) + F) / (m_c + m_p)
-            # 2) theta_ddot = (m_p * l * (g * sin(theta) - x_ddot * cos(theta))) / (I + m_p * l**2)
-
-            # Resolvendo o sistema:
-            # Primeiro, expressa x_ddot em função de theta_ddot
-            # x_ddot = (m_p * l * (theta_dot**2 * sin(theta) - theta_ddot * cos(theta)) + force) / (m_c + m_p)
-            # Substitui x_ddot na equação de theta_ddot e resolve para theta_ddot
-
-            denom = (I + m_p * l**2) * (m_c + m_p) - (m_p**2) * (l**2) * (np.cos(theta)**2)
-            
-            # Numerador de theta_ddot
-            num_theta_ddot = (m_p * l * (g * np.sin(theta)) * (m_c + m_p)
-                              + m_p * l * (np.cos(theta)) * (force)
-                              - m_p**2 * l**2 * theta_dot**2 * np.sin(theta) * np.cos(theta))
-            theta_ddot = num_theta_ddot / denom
-
-            # Agora x_ddot
-            num_x_ddot = (m_p * l * (theta_dot**2 * np.sin(theta) - theta_ddot * np.cos(theta)) + force)
-            x_ddot = num_x_ddot / (m_c + m_p)
-
-            # Atualiza os estados
-            self.cart_velocity += x_ddot * self.dt
-            self.cart_velocity = np.clip(self.cart_velocity, -10, 10)
-            self.cart_position += self.cart_velocity * self.dt
-            self.cart_position = np.clip(self.cart_position, -10, 10)
-
-            self.angular_velocity += theta_ddot * self.dt
-            self.angular_velocity = np.clip(self.angular_velocity, -10, 10)
-            self.angle += self.angular_velocity * self.dt
+            h = self.dt / self.substeps
+            for _ in range(self.substeps):
+                if self.integrator == 'euler':
+                    self._euler_step(force, h)
+                else:
+                    self._runge_kutta_step(force, h)
 
             return {
                 'cart_position': self.cart_position,
@@ -73,6 +96,42 @@ class PendulumSimulation:
             print(f"Erro na simulação do pêndulo: {str(e)}")
             return None
     
+    def _euler_step(self, force, h):
+        """Um passo de Euler semi-implícito (esquema original do simulador)"""
+        theta_ddot, x_ddot = compute_accelerations(
+            self.angle, self.angular_velocity, force,
+            self.mass, self.cart_mass, self.length, self.gravity, self.inertia
+        )
+
+        # Atualiza os estados
+        self.cart_velocity += x_ddot * h
+        self.cart_velocity = np.clip(self.cart_velocity, -10, 10)
+        self.cart_position += self.cart_velocity * h
+        self.cart_position = np.clip(self.cart_position, -10, 10)
+
+        self.angular_velocity += theta_ddot * h
+        self.angular_velocity = np.clip(self.angular_velocity, -10, 10)
+        self.angle += self.angular_velocity * h
+
+    def _runge_kutta_step(self, force, h):
+        """Um passo de RK4 ou um intervalo h integrado pelo RK45 adaptativo"""
+        def derivatives(state):
+            return cartpole_derivatives(state, force, self.mass, self.cart_mass,
+                                        self.length, self.gravity, self.inertia)
+
+        state = np.array([self.cart_position, self.cart_velocity, self.angle, self.angular_velocity])
+        if self.integrator == 'rk4':
+            state = rk4_step(derivatives, state, h)
+        else:
+            state, self._rk45_step, _ = rk45_integrate(derivatives, state, h, self._rk45_step,
+                                                       self.rtol, self.atol)
+
+        # Mesmas saturações do esquema de Euler, aplicadas ao fim do passo
+        self.cart_velocity = float(np.clip(state[1], -10, 10))
+        self.cart_position = float(np.clip(state[0], -10, 10))
+        self.angular_velocity = float(np.clip(state[3], -10, 10))
+        self.angle = float(state[2])
+
     def reset(self):
         """
         Reseta o estado do pêndulo para as condições iniciais
@@ -0,0 +1,142 @@
+"""
+Gravação de trajetórias em disco, passo a passo.
+
+TrajectoryRecorder acumula os passos em um bloco pré-alocado organizado por
+coluna (uma linha contígua por grandeza) e, a cada bloco cheio, acrescenta
+cada coluna ao seu próprio arquivo .npy, em um diretório da gravação, e
+reescreve o cabeçalho do arquivo com o número de valores gravados. A memória
+usada fica limitada ao tamanho do bloco, não há alocação por passo e cada
+arquivo é um .npy válido depois de cada descarga, de modo que execuções
+longas podem ser gravadas inteiras e lidas depois com load_recording sem
+cópia: cada coluna é um array contíguo mapeado do seu arquivo.
+"""
+import os
+import struct
+
+import numpy as np
+
+# Colunas gravadas: tempo simulado, estado após o passo, força aplicada e
+# tempo de relógio gasto no passo (controlador + física), em segundos
+RECORD_COLUMNS = ('time', 'cart_position', 'cart_velocity', 'angle', 'angular_velocity', 'force', 'step_time')
+
+# Maior número de valores previsto no cabeçalho (define o espaço reservado para ele)
+_MAX_ROWS = 10 ** 18
+
+
+def _npy_header(rows, size=None):
+    """
+    Cabeçalho .npy (versão 1.0) de um array float64 1D de `rows` valores,
+    completado com espaços até `size` bytes para poder ser reescrito no mesmo lugar
+    """
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+        np.lib.format.dtype_to_descr(np.dtype(np.float64)), rows)
+    if size is None:
+        # Múltiplo de 64 bytes, com espaço para o maior número de valores
+        size = -(-(len(header) + len(str(_MAX_ROWS)) + 11) // 64) * 64
+    header = header.ljust(size - 11) + '\n'
+    return np.lib.format.magic(1, 0) + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+class TrajectoryRecorder:
+    def __init__(self, path=None, chunk_size=4096, columns=RECORD_COLUMNS):
+        """
+        Args:
+            path (str): Diretório de destino (um arquivo <coluna>.npy por
+                coluna); sem diretório, os blocos ficam em memória
+            chunk_size (int): Passos acumulados em memória antes de cada descarga
+            columns (tuple): Nomes das colunas (float64)
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.columns = tuple(columns)
+
+        self._buffer = np.zeros((len(self.columns), chunk_size))
+        self._fill = 0
+        self._flushed = 0
+        self._chunks = []  # blocos cheios, quando não há diretório
+        self._files = None
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self._header_size = len(_npy_header(0))
+            self._files = []
+            for name in self.columns:
+                f = open(os.path.join(path, f"{name}.npy"), 'wb')
+                f.write(_npy_header(0))
+                f.flush()
+                self._files.append(f)
+
+    def record(self, *values):
+        """Grava um passo (um valor por coluna, na ordem de `columns`)"""
+        self._buffer[:, self._fill] = values
+        self._fill += 1
+        if self._fill == self.chunk_size:
+            self.flush()
+
+    def record_state(self, time, state, force, step_time=0.0):
+        """Grava um passo a partir do dicionário retornado por PendulumSimulation.update"""
+        if state is None:
+            return
+        self.record(time, state['cart_position'], state['cart_velocity'], state['angle'],
+                    state['angular_velocity'], force, step_time)
+
+    def flush(self):
+        """Descarrega o bloco atual (nos arquivos, atualizando os cabeçalhos)"""
+        if self._fill == 0:
+            return
+        if self._files is None:
+            self._chunks.append(self._buffer[:, :self._fill])
+            self._buffer = np.zeros((len(self.columns), self.chunk_size))
+        else:
+            header = _npy_header(self._flushed + self._fill, self._header_size)
+            for f, column in zip(self._files, self._buffer):
+                f.write(memoryview(column[:self._fill]).cast('B'))
+                f.seek(0)
+                f.write(header)
+                f.seek(0, 2)
+                f.flush()
+        self._flushed += self._fill
+        self._fill = 0
+
+    def close(self):
+        """Descarrega o que falta e fecha os arquivos"""
+        self.flush()
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+
+    def data(self):
+        """
+        Passos gravados até agora (depois de descarregar o bloco atual).
+
+        Returns:
+            dict: Um array contíguo por coluna; mapeado do arquivo (somente
+                leitura) quando há diretório
+        """
+        self.flush()
+        if len(self) == 0:
+            return {name: np.zeros(0) for name in self.columns}
+        if self.path is not None:
+            return load_recording(self.path)
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks, axis=1)]
+        return dict(zip(self.columns, self._chunks[0]))
+
+    def __len__(self):
+        return self._flushed + self._fill
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_recording(path, mmap=True):
+    """
+    Carrega uma gravação de TrajectoryRecorder: um array por coluna (por
+    exemplo, load_recording(path)['angle']). Com mmap, cada coluna é lida do
+    seu arquivo sob demanda, sem cópia e sem passar pelas outras colunas.
+    """
+    names = sorted(name[:-4] for name in os.listdir(path) if name.endswith('.npy'))
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None) for name in names}
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from src.controllers.fis_controller import FISController
+
+
+def test_compiled_table_matches_edges_without_rules():
+    """Onde nenhuma regra dispara, a tabela devolve a mesma força zero do sistema exato"""
+    compiled = FISController(compiled=True)
+    exact = FISController()
+    angles = np.array([-3.0, compiled.angle_range[0], 0.2, 0.0])
+    velocities = np.array([0.5, -1.0, -9.0, compiled.angular_velocity_range[0]])
+    np.testing.assert_array_equal(compiled.compute_control_batch(angles, velocities), 0.0)
+    np.testing.assert_array_equal(exact.compute_control_batch(angles, velocities), 0.0)
+
+
+def test_compiled_max_error_bounds_off_grid_error():
+    """O erro medido na compilação vale para pontos fora dos nós da grade"""
+    controller = FISController(compiled=True, table_resolution=51)
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(controller.angle_range[0], controller.angle_range[-1], 2000)
+    velocities = rng.uniform(controller.angular_velocity_range[0], controller.angular_velocity_range[-1], 2000)
+    error = np.abs(controller._interpolate_batch(angles, velocities) - controller._sample_rule_base(angles, velocities))
+    assert error.max() <= controller.compiled_max_error
+
+
+def test_table_resolution_must_have_one_cell():
+    with pytest.raises(ValueError):
+        FISController(compiled=True, table_resolution=1)
+    controller = FISController()
+    with pytest.raises(ValueError):
+        controller.set_compiled(True, table_resolution=1)
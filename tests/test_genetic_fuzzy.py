@@ -0,0 +1,80 @@
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+from src.controllers.genetic_fuzzy import GeneticFuzzyController
+
+
+def test_controller_copies_after_parallel_generation():
+    """O controlador continua copiável depois de avaliar com o pool de processos"""
+    controller = GeneticFuzzyController(population_size=8, n_workers=2, seed=0, evaluation_mode='individual')
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(-np.pi/2, np.pi/2, 10)
+    velocities = rng.uniform(-5, 5, 10)
+    test_cases = np.column_stack([angles, velocities, -2 * angles - velocities])
+    try:
+        controller.evolve(test_cases)
+        assert controller._executor is not None
+
+        for clone in (pickle.loads(pickle.dumps(controller)), copy.deepcopy(controller)):
+            assert clone._executor is None
+            np.testing.assert_array_equal(clone.genomes, controller.genomes)
+            np.testing.assert_array_equal(clone.evaluate_population(test_cases),
+                                          controller.evaluate_population(test_cases))
+            clone.shutdown()
+    finally:
+        controller.shutdown()
+
+
+def test_population_views_are_read_only():
+    controller = GeneticFuzzyController(population_size=4, seed=0)
+    individual = controller.population[0]
+    with pytest.raises(ValueError):
+        individual['angle_widths'][0] = 0.0
+    np.testing.assert_array_equal(individual['rule_weights'], controller.genomes[0, -25:])
+
+
+def test_resume_evolution_continues_adaptive_mutation():
+    """Evoluir uma cópia e retomar no original equivale a evoluir o original"""
+    rng = np.random.default_rng(1)
+    angles = rng.uniform(-np.pi/2, np.pi/2, 10)
+    velocities = rng.uniform(-5, 5, 10)
+    test_cases = np.column_stack([angles, velocities, -2 * angles - velocities])
+
+    reference = GeneticFuzzyController(population_size=10, seed=0)
+    resumed = GeneticFuzzyController(population_size=10, seed=0)
+    worker = copy.deepcopy(resumed)
+    for _ in range(3):
+        reference.evolve(test_cases)
+        worker.evolve(test_cases)
+    resumed.resume_evolution(worker)
+
+    assert resumed.mutation_step == reference.mutation_step
+    np.testing.assert_array_equal(resumed.evolve(test_cases), reference.evolve(test_cases))
+    np.testing.assert_array_equal(resumed.genomes, reference.genomes)
+    assert resumed.mutation_step == reference.mutation_step
+
+
+def test_fitness_mode_change_rescores_best_individual():
+    """Trocar a função de fitness não deixa o melhor da escala antiga bloquear a nova"""
+    controller = GeneticFuzzyController(population_size=6, seed=0, fitness_mode='rollout',
+                                        rollout_params={'horizon': 0.5})
+    initial_states = np.array([[0.1, 0.0], [-0.2, 0.5]])
+    controller.evolve(initial_states)
+    best = controller.best_individual
+
+    controller.update_parameters(fitness_mode='rollout')
+    assert not controller._best_stale
+    controller.update_parameters(fitness_mode='cases')
+    assert controller.best_fitness == float('-inf')
+
+    rng = np.random.default_rng(2)
+    angles = rng.uniform(-np.pi/2, np.pi/2, 10)
+    velocities = rng.uniform(-5, 5, 10)
+    test_cases = np.column_stack([angles, velocities, -2 * angles - velocities])
+    fitness_scores = controller.evolve(test_cases)
+    rescored = controller._evaluate_individuals(
+        np.concatenate([best[name] for name in best])[None], test_cases)[0]
+    assert controller.best_fitness == max(rescored, fitness_scores.max())